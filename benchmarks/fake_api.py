@@ -0,0 +1,256 @@
+'''
+Local stand-in for the OVHcloud API, used by the benchmarks.
+
+It validates signed requests like the real API and implements the few routes used by the collection:
+/auth/time, /auth/credential, /auth/currentCredential and /me/api/credential[/{id}].
+Latency and throttling (429) can be injected to reproduce a loaded API.
+Large responses are gzip compressed when the client accepts it, like the real API.
+'''
+
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = '/1.0'
+MAX_TIME_SKEW = 180
+GZIP_MIN_SIZE = 1024
+
+CREDENTIAL_PATH = re.compile(r'^/me/api/credential/(\d+)$')
+
+
+class FakeAPI(object):
+    def __init__(self, application_key='bench-ak', application_secret='bench-as', credentials=100,
+                 rules_per_credential=10, latency=0.0, throttle_rate=0.0, seed=0):
+        self.application_key = application_key
+        self.application_secret = application_secret
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        self.throttled = 0
+
+        self.credentials = {}
+        self.consumer_keys = {}
+        for _ in range(credentials):
+            self.add_credential(
+                rules=[dict(method='GET', path='/service/%d/*' % index) for index in range(rules_per_credential)],
+                status='validated',
+            )
+
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return 'http://%s:%d%s' % (self.server.server_address[0], self.server.server_address[1], API_PREFIX)
+
+    @property
+    def consumer_key(self):
+        '''A validated consumer key, to authenticate the benchmarked modules.'''
+        return next(iter(self.consumer_keys))
+
+    def add_credential(self, rules, status='pendingValidation'):
+        with self.lock:
+            credential_id = len(self.credentials) + 1
+            consumer_key = 'bench-ck-%d' % credential_id
+
+            self.credentials[credential_id] = dict(
+                credentialId=credential_id,
+                applicationId=1,
+                status=status,
+                rules=rules,
+                allowedIPs=None,
+                creation='2021-01-01T00:00:00+00:00',
+                expiration=None,
+                lastUse=None,
+                ovhSupport=False,
+            )
+            self.consumer_keys[consumer_key] = credential_id
+
+        return consumer_key, credential_id
+
+    def reset_counters(self):
+        with self.lock:
+            self.calls.clear()
+            self.throttled = 0
+
+    def start(self, address='127.0.0.1', port=0):
+        api = self
+
+        class Handler(RequestHandler):
+            pass
+
+        Handler.api = api
+
+        self.server = ThreadingHTTPServer((address, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately: with Nagle, keep-alive responses wait for delayed ACKs.
+    disable_nagle_algorithm = True
+    api: FakeAPI
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch()
+
+    def do_POST(self):
+        self.dispatch()
+
+    def do_PUT(self):
+        self.dispatch()
+
+    def do_DELETE(self):
+        self.dispatch()
+
+    def dispatch(self):
+        api = self.api
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8') if length else ''
+
+        path = self.path[len(API_PREFIX):] if self.path.startswith(API_PREFIX) else self.path
+        route = CREDENTIAL_PATH.sub('/me/api/credential/{id}', path.split('?')[0])
+
+        with api.lock:
+            api.calls[(self.command, route)] += 1
+            throttled = api.throttle_rate > 0 and api.random.random() < api.throttle_rate
+            if throttled:
+                api.throttled += 1
+
+        if api.latency:
+            time.sleep(api.latency)
+
+        if throttled:
+            return self.reply(HTTPStatus.TOO_MANY_REQUESTS, dict(message='Too many requests'), {'Retry-After': '1'})
+
+        if route == '/auth/time' and self.command == 'GET':
+            return self.reply(HTTPStatus.OK, int(time.time()))
+
+        if self.headers.get('X-Ovh-Application') != api.application_key:
+            return self.error(HTTPStatus.FORBIDDEN, 'INVALID_KEY', 'Invalid application key')
+
+        if route == '/auth/credential' and self.command == 'POST':
+            payload = json.loads(body or '{}')
+            consumer_key, _ = api.add_credential(payload.get('accessRules') or [])
+            return self.reply(HTTPStatus.OK, dict(
+                consumerKey=consumer_key,
+                state='pendingValidation',
+                validationUrl='%s/auth/?credentialToken=%s' % (api.url, consumer_key),
+            ))
+
+        credential_id = self.authenticate(body)
+        if credential_id is None:
+            return
+
+        if route == '/auth/currentCredential' and self.command == 'GET':
+            return self.reply(HTTPStatus.OK, api.credentials[credential_id])
+
+        if route == '/me/api/credential' and self.command == 'GET':
+            query = parse_qs(urlsplit(path).query)
+            return self.reply(HTTPStatus.OK, sorted(
+                credential_id for credential_id, credential in api.credentials.items()
+                if all(str(credential.get(key)) in values for key, values in query.items())
+            ))
+
+        match = CREDENTIAL_PATH.match(path.split('?')[0])
+        if match:
+            subject_id = int(match.group(1))
+            if subject_id not in api.credentials:
+                return self.error(HTTPStatus.NOT_FOUND, None, 'The requested object (credentialId = %d) does not exist'
+                                  % subject_id)
+
+            if self.command == 'GET':
+                return self.reply(HTTPStatus.OK, api.credentials[subject_id])
+
+            if self.command == 'PUT':
+                with api.lock:
+                    api.credentials[subject_id].update(json.loads(body or '{}'))
+                return self.reply(HTTPStatus.OK, None)
+
+            if self.command == 'DELETE':
+                with api.lock:
+                    del api.credentials[subject_id]
+                return self.reply(HTTPStatus.OK, None)
+
+        return self.error(HTTPStatus.NOT_FOUND, None, 'Got an invalid (or empty) URL')
+
+    def authenticate(self, body):
+        api = self.api
+
+        consumer_key = self.headers.get('X-Ovh-Consumer')
+        timestamp = self.headers.get('X-Ovh-Timestamp') or '0'
+        signature = self.headers.get('X-Ovh-Signature')
+
+        if abs(int(timestamp) - time.time()) > MAX_TIME_SKEW:
+            self.error(HTTPStatus.BAD_REQUEST, 'QUERY_TIME_OUT', 'Query out of time')
+            return None
+
+        target = 'http://%s%s' % (self.headers.get('Host'), self.path)
+        expected = '$1$' + hashlib.sha1('+'.join([
+            api.application_secret, consumer_key or '', self.command, target, body, timestamp,
+        ]).encode('utf-8')).hexdigest()
+
+        if signature != expected:
+            self.error(HTTPStatus.BAD_REQUEST, 'INVALID_SIGNATURE', 'Invalid signature')
+            return None
+
+        credential_id = api.consumer_keys.get(consumer_key)
+        if credential_id is None or credential_id not in api.credentials:
+            self.error(HTTPStatus.FORBIDDEN, 'INVALID_CREDENTIAL', 'This credential does not exist')
+            return None
+
+        return credential_id
+
+    def error(self, status, error_code, message):
+        payload = dict(message=message)
+        if error_code:
+            payload['errorCode'] = error_code
+
+        self.reply(status, payload)
+
+    def reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+
+        compressed = len(data) > GZIP_MIN_SIZE and 'gzip' in self.headers.get('Accept-Encoding', '')
+        if compressed:
+            data = gzip.compress(data, compresslevel=1)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+        self.wfile.write(data)
@@ -0,0 +1,337 @@
+'''
+Offline benchmarks of the collection.
+
+Modules are run against a local fake OVHcloud API (see fake_api.py) to measure their wall time and
+the number of HTTP calls they make. Import times and the throughput of the validation and ip
+helpers are measured too.
+
+    python benchmarks/run.py                       # print the report
+    python benchmarks/run.py --compare             # compare the API calls with benchmarks/baseline.json
+    python benchmarks/run.py --compare --timings   # also compare the timings, on the machine of the baseline
+    python benchmarks/run.py --save-baseline       # store the report as the new baseline
+'''
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+
+from fake_api import FakeAPI
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+COLLECTION = 'ansible_collections.holyhope.ovh'
+MODULES = ('allowed_ips', 'api', 'consumer_key', 'credential', 'credentials_info', 'new_consumer_key', 'wait_for_request')
+SIZES = (10, 1000, 100000)
+
+
+@contextmanager
+def collection_path():
+    '''Exposes the repository as ansible_collections/holyhope/ovh.'''
+    with tempfile.TemporaryDirectory() as directory:
+        namespace = os.path.join(directory, 'ansible_collections', 'holyhope')
+        os.makedirs(namespace)
+        os.symlink(ROOT_DIR, os.path.join(namespace, 'ovh'))
+
+        yield directory
+
+
+class Benchmark(object):
+    def __init__(self, collections_dir, repeat, latency, throttle_rate):
+        self.collections_dir = collections_dir
+        self.repeat = repeat
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.cache_dir = tempfile.mkdtemp(prefix='holyhope-ovh-bench-')
+        self.metrics = {}
+
+    def close(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def reset_cache(self):
+        '''
+        Empties the cache dir, so that every repeat makes the same calls, /auth/time included.
+        '''
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def env(self, endpoint=None, endpoints=None):
+        env = dict(os.environ)
+        paths = [self.collections_dir]
+        if endpoint:
+            paths.insert(0, os.path.join(BENCH_DIR, 'site'))
+            env['OVH_BENCH_ENDPOINT'] = endpoint
+        if endpoints:
+            env['OVH_BENCH_ENDPOINTS'] = json.dumps(endpoints)
+        env['PYTHONPATH'] = os.pathsep.join(paths + [env.get('PYTHONPATH', '')])
+        return env
+
+    def run_module(self, api, module, args, endpoints=None):
+        args = dict(
+            endpoint='ovh-eu',
+            application_key=api.application_key,
+            application_secret=api.application_secret,
+            cache_dir=self.cache_dir,
+            **args
+        )
+
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as f:
+            json.dump(dict(ANSIBLE_MODULE_ARGS=args), f)
+            f.flush()
+
+            start = time.perf_counter()
+            process = subprocess.run(
+                [sys.executable, os.path.join(ROOT_DIR, 'plugins', 'modules', module + '.py'), f.name],
+                env=self.env(api.url, endpoints), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            )
+            elapsed = time.perf_counter() - start
+
+        try:
+            result = json.loads(process.stdout.decode('utf-8'))
+        except ValueError:
+            raise RuntimeError('%s did not return json: %s' % (module, process.stderr.decode('utf-8')))
+
+        if result.get('failed'):
+            raise RuntimeError('%s failed: %s' % (module, result.get('msg')))
+
+        return elapsed, result
+
+    def bench_module(self, name, module, args_factory):
+        timings = []
+        for _ in range(self.repeat):
+            # A fresh API and cache for each repeat: writes of a run must not turn the next ones into no-ops.
+            self.reset_cache()
+            with FakeAPI(latency=self.latency, throttle_rate=self.throttle_rate) as api:
+                elapsed, _ = self.run_module(api, module, args_factory(api))
+                timings.append(elapsed)
+
+        self.metrics['module.%s.seconds' % name] = statistics.median(timings)
+        self.metrics['module.%s.calls' % name] = sum(api.calls.values())
+        self.metrics['module.%s.throttled' % name] = api.throttled
+
+    def bench_modules(self):
+        self.bench_module('consumer_key', 'consumer_key', lambda api: dict(consumer_key=api.consumer_key))
+        self.bench_module('consumer_key_by_id', 'consumer_key', lambda api: dict(
+            consumer_key=api.consumer_key,
+            subject_credential_id=2,
+        ))
+        self.bench_module('consumer_key_all', 'consumer_key', lambda api: dict(
+            consumer_key=api.consumer_key,
+            subject_credential_ids='all',
+        ))
+        self.bench_module('credentials_info', 'credentials_info', lambda api: dict(
+            consumer_key=api.consumer_key,
+            status=['validated'],
+            unused_for=30,
+        ))
+        self.bench_module('allowed_ips', 'allowed_ips', lambda api: dict(
+            consumer_key=api.consumer_key,
+            subject_credential_id=2,
+            ips=['10.0.%d.%d' % (i // 256, i % 256) for i in range(1024)],
+        ))
+        self.bench_module('credential', 'credential', lambda api: dict(
+            consumer_key=api.consumer_key,
+            subject_credential_id=2,
+            state='validated',
+            ips=['10.0.%d.%d' % (i // 256, i % 256) for i in range(1024)],
+        ))
+        self.bench_module('api', 'api', lambda api: dict(
+            consumer_key=api.consumer_key,
+            calls=[dict(name='credentials', path='/me/api/credential')] + [
+                dict(path='/me/api/credential/%d' % credential_id, depends_on=['credentials'])
+                for credential_id in range(1, 21)
+            ] + [
+                dict(method='DELETE', path='/me/api/credential/999999', check=dict(state='absent')),
+            ],
+        ))
+        self.bench_module('new_consumer_key', 'new_consumer_key', lambda api: dict(
+            accesses={'/me/*': ['GET'], '/me/api': ['GET']},
+        ))
+        self.bench_accounts()
+
+    def bench_accounts(self):
+        '''
+        credentials_info over one account per endpoint: the run should last as long as a single account.
+        '''
+        with ExitStack() as stack:
+            apis = {
+                endpoint: stack.enter_context(FakeAPI(latency=self.latency, throttle_rate=self.throttle_rate, seed=seed))
+                for seed, endpoint in enumerate(('ovh-eu', 'ovh-ca', 'ovh-us'))
+            }
+            accounts = [
+                dict(name=endpoint, endpoint=endpoint, application_key=api.application_key,
+                     application_secret=api.application_secret, consumer_key=api.consumer_key)
+                for endpoint, api in apis.items()
+            ]
+
+            timings = []
+            for _ in range(self.repeat):
+                self.reset_cache()
+                for api in apis.values():
+                    api.reset_counters()
+
+                elapsed, _ = self.run_module(apis['ovh-eu'], 'credentials_info', dict(accounts=accounts),
+                                             endpoints={endpoint: api.url for endpoint, api in apis.items()})
+                timings.append(elapsed)
+
+            self.metrics['module.credentials_info_accounts.seconds'] = statistics.median(timings)
+            self.metrics['module.credentials_info_accounts.calls'] = sum(
+                sum(api.calls.values()) for api in apis.values())
+            self.metrics['module.credentials_info_accounts.throttled'] = sum(api.throttled for api in apis.values())
+
+    def bench_imports(self):
+        '''
+        Cold imports compile the collection from source, like AnsiballZ payloads which are imported from a zip
+        file without bytecode. Warm imports reuse the bytecode cache of the collection.
+        '''
+        code = 'import time; t = time.perf_counter(); import {0}.plugins.modules.{1}; print(time.perf_counter() - t)'
+
+        with tempfile.TemporaryDirectory() as directory:
+            copy = os.path.join(directory, 'ansible_collections', 'holyhope', 'ovh')
+            shutil.copytree(os.path.join(ROOT_DIR, 'plugins'), os.path.join(copy, 'plugins'),
+                            ignore=shutil.ignore_patterns('__pycache__'))
+
+            env = self.env()
+            env['PYTHONPATH'] = os.pathsep.join([directory, os.environ.get('PYTHONPATH', '')])
+
+            for module in MODULES:
+                for mode, flags in (('cold', ['-B']), ('warm', [])):
+                    command = [sys.executable] + flags + ['-c', code.format(COLLECTION, module)]
+                    if mode == 'warm':
+                        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+
+                    timings = []
+                    for _ in range(self.repeat):
+                        process = subprocess.run(command, env=env, stdout=subprocess.PIPE, check=True)
+                        timings.append(float(process.stdout))
+
+                    self.metrics['import.%s.%s.seconds' % (module, mode)] = statistics.median(timings)
+
+    def bench_throughput(self):
+        sys.path.insert(0, self.collections_dir)
+
+        from ansible_collections.holyhope.ovh.plugins.module_utils.ips import \
+            diff_ips
+        from ansible_collections.holyhope.ovh.plugins.module_utils.validation import (
+            check_type_accesses, compile_accesses)
+
+        for size in SIZES:
+            accesses = {'/service/%d/*' % i: ['GET', 'post'] for i in range(size)}
+            self.measure('check_type_accesses.%d' % size, size, lambda: check_type_accesses(dict(accesses)))
+
+            checked = check_type_accesses(dict(accesses))
+            self.measure('compile_accesses.%d' % size, size, lambda: compile_accesses(checked))
+
+            current = ['10.%d.%d.%d' % (i // 65536, i // 256 % 256, i % 256) for i in range(size)]
+            desired = current[size // 2:] + ['172.16.%d.%d' % (i // 256 % 256, i % 256) for i in range(size // 2)]
+            self.measure('diff_ips.%d' % size, size, lambda: diff_ips(current, desired))
+
+    def measure(self, name, size, func):
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        self.metrics['throughput.%s.items_per_second' % name] = size / max(statistics.median(timings), 1e-9)
+
+
+def higher_is_better(metric):
+    return metric.endswith('per_second')
+
+
+def compare(metrics, baseline, max_regression, timings=False):
+    '''
+    Returns the metrics regressing from the baseline: API calls, and timings and throughputs beyond
+    max_regression when timings is set. Timings depend on the machine, their regressions are only shown otherwise.
+    '''
+    regressions = []
+
+    print('%-60s %14s %14s %8s' % ('metric', 'baseline', 'current', 'ratio'))
+    for metric in sorted(metrics):
+        current = metrics[metric]
+        previous = baseline.get(metric)
+        if not previous:
+            print('%-60s %14s %14.4g %8s' % (metric, '-', current, '-'))
+            continue
+
+        ratio = current / previous
+        regression = ratio < 1 - max_regression if higher_is_better(metric) else ratio > 1 + max_regression
+        # Call counts are exact: any additional API call is a regression.
+        exact = metric.endswith('.calls')
+        if exact:
+            regression = current > previous
+
+        gated = exact or (timings and not metric.endswith('.throttled'))
+        print('%-60s %14.4g %14.4g %7.2fx%s' % (
+            metric, previous, current, ratio, (' !' if gated else ' ?') if regression else ''))
+        if regression and gated:
+            regressions.append(metric)
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='runs of each measure, the median is kept')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to each fake API response')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='ratio of fake API responses being 429')
+    parser.add_argument('--only', choices=('modules', 'imports', 'throughput'), action='append',
+                        help='run only these benchmarks')
+    parser.add_argument('--output', help='write the report to this json file')
+    parser.add_argument('--compare', action='store_true', help='compare with the baseline')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline json file')
+    parser.add_argument('--save-baseline', action='store_true', help='store the report as the baseline')
+    parser.add_argument('--timings', action='store_true',
+                        help='also fail the comparison on timing and throughput regressions')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='tolerated relative regression of timings and throughputs')
+    options = parser.parse_args()
+
+    benchmarks = options.only or ['modules', 'imports', 'throughput']
+
+    with collection_path() as collections_dir, \
+            Benchmark(collections_dir, options.repeat, options.latency, options.throttle_rate) as bench:
+        for benchmark in benchmarks:
+            getattr(bench, 'bench_%s' % benchmark)()
+
+    metrics = bench.metrics
+
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(metrics, f, indent=2, sort_keys=True)
+
+    if options.save_baseline:
+        with open(options.baseline, 'w') as f:
+            json.dump(metrics, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    baseline = {}
+    if options.compare:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+
+    regressions = compare(metrics, baseline, options.max_regression, options.timings)
+    if regressions:
+        print('\n%d regression(s): %s' % (len(regressions), ', '.join(regressions)))
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,21 @@
+'''
+Points the ovh-eu endpoint of python-ovh to the fake API of the benchmarks, and the endpoints
+of OVH_BENCH_ENDPOINTS (a json object of endpoint names and urls) to the other fake APIs.
+
+This directory is only added to PYTHONPATH of the module runs started by benchmarks/run.py.
+'''
+
+import os
+
+if os.environ.get('OVH_BENCH_ENDPOINT'):
+    try:
+        from ovh import client
+    except ImportError:
+        pass
+    else:
+        client.ENDPOINTS['ovh-eu'] = os.environ['OVH_BENCH_ENDPOINT']
+
+        if os.environ.get('OVH_BENCH_ENDPOINTS'):
+            import json
+
+            client.ENDPOINTS.update(json.loads(os.environ['OVH_BENCH_ENDPOINTS']))
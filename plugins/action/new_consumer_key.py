@@ -0,0 +1,12 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from ansible_collections.holyhope.ovh.plugins.plugin_utils.controller import \
+    ControllerActionBase
+
+
+class ActionModule(ControllerActionBase):
+    module_name = 'holyhope.ovh.new_consumer_key'
+    # Every host gets its own consumer key.
+    coalesce = False
@@ -0,0 +1,252 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import json
+import os
+import time
+
+from ansible.plugins.callback import CallbackBase
+from ansible_collections.holyhope.ovh.plugins.module_utils.stats import (
+    EMPTY_AGGREGATE, merge)
+
+DOCUMENTATION = '''
+---
+name: api_stats
+type: aggregate
+version_added: "1.1.0"
+short_description: Recap of the OVHcloud API calls of a run
+description:
+    - Adds up the C(api_stats) and C(response_cache) blocks returned by the modules of the collection, and prints
+      at the end of the run the calls, errors, throttled calls (HTTP 429), time spent, latency percentiles
+      and response cache hits, in total, per task and per path template.
+    - Enabling the callback sets the C(OVH_API_STATS) environment variable, so that the modules run on the
+      controller return their C(api_stats) without setting I(api_stats) on every task.
+    - Results reused by other hosts (C(coalesced)) made no API call and are only counted as such.
+    - Latency percentiles of several module runs are estimated from their histograms, within about 50%.
+options:
+    top:
+        description:
+            - Maximum number of tasks and of path templates printed, the most time consuming first.
+        type: int
+        default: 20
+        env:
+            - name: OVH_API_STATS_TOP
+        ini:
+            - section: ovh_api_stats
+              key: top
+    export_path:
+        description:
+            - File to which the recap of the run is appended as a line of JSON, to track it over time.
+        type: path
+        required: false
+        env:
+            - name: OVH_API_STATS_EXPORT
+        ini:
+            - section: ovh_api_stats
+              key: export_path
+requirements:
+    - enable in configuration, e.g. C(callbacks_enabled = holyhope.ovh.api_stats) in C(ansible.cfg)
+author:
+    - Pierre PÉRONNET <pierre.peronnet@ovhcloud.com>
+'''
+
+EMPTY_CACHE = dict(hits=0, misses=0, invalidations=0)
+
+
+def module_results(result: 'Dict[str,Any]') -> 'Iterator[Dict[str,Any]]':
+    '''
+    Yields the result of each module run of a task result, one per item of a loop.
+
+    >>> [item['n'] for item in module_results(dict(n=0, results=[dict(n=1), 'skipped', dict(n=2)]))]
+    [0, 1, 2]
+    '''
+    yield result
+
+    for item in result.get('results') or []:
+        if isinstance(item, dict):
+            yield item
+
+
+class Usage(object):
+    '''
+    API usage of a task, a host, a play or the whole run.
+
+    >>> usage = Usage()
+    >>> usage.add(dict(total=dict(calls=2, throttled=1, seconds=0.5, histogram={'0.3': 2}, max=0.3)), dict(hits=3))
+    >>> usage.add(None, None, coalesced=True)
+    >>> usage.to_dict()['api_stats']['calls'], usage.to_dict()['response_cache']['hits'], usage.coalesced
+    (2, 3, 1)
+    '''
+
+    def __init__(self):
+        self.runs = 0
+        self.coalesced = 0
+        self.total: 'Dict[str,Any]' = EMPTY_AGGREGATE
+        self.cache: 'Dict[str,int]' = dict(EMPTY_CACHE)
+
+    def add(self, api_stats: 'Optional[Dict[str,Any]]', response_cache: 'Optional[Dict[str,int]]',
+            coalesced: bool = False):
+        self.runs += 1
+
+        if coalesced:
+            self.coalesced += 1
+            return
+
+        if api_stats:
+            self.total = merge(self.total, api_stats.get('total', {}))
+
+        for key, value in (response_cache or {}).items():
+            self.cache[key] = self.cache.get(key, 0) + value
+
+    def to_dict(self) -> 'Dict[str,Any]':
+        return dict(runs=self.runs, coalesced=self.coalesced, api_stats=self.total, response_cache=self.cache)
+
+
+class CallbackModule(CallbackBase):
+    '''
+    Prints the OVHcloud API usage of the run.
+    '''
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'holyhope.ovh.api_stats'
+    CALLBACK_NEEDS_ENABLED = True
+
+    COLUMNS = [
+        ('calls', '%d'),
+        ('errors', '%d'),
+        ('throttled', '%d'),
+        ('retries', '%d'),
+        ('seconds', '%.2f'),
+        ('p50', '%.3f'),
+        ('p95', '%.3f'),
+    ]
+
+    def __init__(self, display=None):
+        super().__init__(display=display)
+
+        # Modules run on the controller inherit its environment.
+        os.environ.setdefault('OVH_API_STATS', 'true')
+
+        self.started = time.time()
+        self.play: 'Optional[str]' = None
+        self.run = Usage()
+        self.plays: 'Dict[str,Usage]' = {}
+        self.tasks: 'Dict[Tuple[str,str],Usage]' = {}
+        self.hosts: 'Dict[str,Usage]' = {}
+        self.paths: 'Dict[str,Dict[str,Any]]' = {}
+
+    def v2_playbook_on_play_start(self, play):
+        self.play = play.get_name().strip()
+
+    def v2_runner_on_ok(self, result):
+        self._record(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result)
+
+    def _record(self, result):
+        play = self.play or ''
+        task = result._task.get_name().strip()
+        host = result._host.get_name()
+
+        for module_result in module_results(result._result):
+            api_stats = module_result.get('api_stats')
+            response_cache = module_result.get('response_cache')
+            coalesced = bool(module_result.get('coalesced'))
+
+            if not (api_stats or response_cache or coalesced):
+                continue
+
+            for usage in (
+                self.run,
+                self.plays.setdefault(play, Usage()),
+                self.tasks.setdefault((play, task), Usage()),
+                self.hosts.setdefault(host, Usage()),
+            ):
+                usage.add(api_stats, response_cache, coalesced)
+
+            if api_stats and not coalesced:
+                for path, aggregate in api_stats.get('paths', {}).items():
+                    self.paths[path] = merge(self.paths.get(path, EMPTY_AGGREGATE), aggregate)
+
+    def v2_playbook_on_stats(self, stats):
+        if not self.run.runs:
+            return
+
+        total = self.run.total
+        throttled = 100.0 * total['throttled'] / total['calls'] if total['calls'] else 0.0
+
+        self._display.banner('OVH API RECAP')
+        self._display.display(
+            '%d API call(s) in %d module run(s), %d error(s), %d throttled (%.1f%%), %.2fs spent in requests' % (
+                total['calls'], self.run.runs - self.run.coalesced, total['errors'], total['throttled'],
+                throttled, total['seconds']))
+        self._display.display('%d coalesced run(s), response cache: %d hit(s), %d miss(es), %d invalidation(s)' % (
+            self.run.coalesced, self.run.cache['hits'], self.run.cache['misses'], self.run.cache['invalidations']))
+
+        top = self.get_option('top')
+
+        tasks = sorted(self.tasks.items(), key=lambda item: item[1].total['seconds'], reverse=True)[:top]
+        self._table('Task', [
+            ('%s : %s' % (play, task) if play else task, usage.total, usage.cache['hits'])
+            for (play, task), usage in tasks
+        ])
+
+        paths = sorted(self.paths.items(), key=lambda item: item[1]['seconds'], reverse=True)[:top]
+        self._table('Path', [(path, aggregate, None) for path, aggregate in paths])
+
+        export_path = self.get_option('export_path')
+        if export_path:
+            self._export(export_path)
+
+    def _table(self, title: str, rows: 'List[Tuple[str,Dict[str,Any],Optional[int]]]'):
+        if not rows:
+            return
+
+        # Cache counters are not known per path.
+        with_cache = any(hits is not None for _, _, hits in rows)
+
+        header = [title] + [name for name, _ in self.COLUMNS] + (['cache hits'] if with_cache else [])
+        lines = [header] + [
+            [label] + [pattern % aggregate[name] for name, pattern in self.COLUMNS] + ([str(hits)] if with_cache else [])
+            for label, aggregate, hits in rows
+        ]
+
+        widths = [max(len(line[index]) for line in lines) for index in range(len(header))]
+
+        self._display.display('')
+        for line in lines:
+            self._display.display('  '.join(
+                [line[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(line[1:], widths[1:])]))
+
+    def _export(self, path: str):
+        record = dict(
+            started=self.started,
+            finished=time.time(),
+            run=self.run.to_dict(),
+            plays={play: usage.to_dict() for play, usage in self.plays.items()},
+            tasks=[dict(play=play, task=task, **usage.to_dict()) for (play, task), usage in self.tasks.items()],
+            hosts={host: usage.to_dict() for host, usage in self.hosts.items()},
+            paths=self.paths,
+        )
+
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            with open(path, 'a') as f:
+                f.write(json.dumps(record, sort_keys=True) + '\n')
+        except (IOError, OSError) as e:
+            self._display.warning('Unable to export the OVH API recap to %s: %s' % (path, e))
@@ -15,19 +15,177 @@ options:
     endpoint:
         description:
             - The endpoint to communicate with ovh. See https://github.com/ovh/python-ovh#configuration
-        required: true
+            - Required unless the module runs through the C(holyhope.ovh.ovh) httpapi plugin.
+        required: false
     application_key:
         description:
             - The Application key created thanks to https://api.ovh.com/createApp
-        required: true
+            - Required unless the module runs through the C(holyhope.ovh.ovh) httpapi plugin.
+        required: false
     application_secret:
         description:
             - The Application secret matching the key
-        required: true
+            - Required unless the module runs through the C(holyhope.ovh.ovh) httpapi plugin.
+        required: false
     consumer_key:
         description:
             - Consumer key used by Ansible o communicate with OVHcloud API.
-        required: True
+            - Required unless the module runs through the C(holyhope.ovh.ovh) httpapi plugin,
+              which uses its own consumer key by default.
+        required: false
+    pool_size:
+        description:
+            - Maximum number of keep-alive HTTP connections kept open to the endpoint.
+            - Clients are memoized per endpoint, application key and consumer key for the whole module run.
+            - It also caps the number of requests in flight, whatever the I(concurrency) of a module.
+        type: int
+        default: 10
+        required: false
+    cache_dir:
+        description:
+            - Directory of the cache shared by the module runs on the same machine.
+            - Can also be set with the C(OVH_CACHE_DIR) environment variable.
+        type: path
+        default: ~/.ansible/cache/holyhope.ovh
+        required: false
+    time_delta_ttl:
+        description:
+            - Seconds during which the clock delta with the endpoint is reused from the cache
+              instead of requesting C(/auth/time).
+            - The delta is refreshed as soon as the API rejects the timestamp of a request.
+            - Set to 0 to disable the cache.
+        type: int
+        default: 3600
+        required: false
+    api_stats:
+        description:
+            - Return an C(api_stats) block with the method, path, status, latency, retries and size of every
+              API request, aggregated in total and per path template (C(/me/api/credential/{id})) with
+              p50 and p95 latencies.
+            - Each aggregate also holds the C(max) latency and a C(histogram) of latencies, so that the
+              C(holyhope.ovh.api_stats) callback can add up the aggregates of every task.
+            - Can also be set with the C(OVH_API_STATS) environment variable.
+        type: bool
+        default: false
+        required: false
+    rate_limit:
+        description:
+            - Maximum number of requests per second sent to the endpoint with the application key,
+              shared by every module run on the same machine using the same I(cache_dir), e.g. Ansible forks.
+            - Requests throttled by the API (HTTP 429) also hold back the other module runs for the
+              C(Retry-After) delay.
+            - Set to 0 to only rely on the throttling of the API.
+            - Can also be set with the C(OVH_RATE_LIMIT) environment variable.
+        type: float
+        default: 0
+        required: false
+    rate_burst:
+        description:
+            - Number of requests which can be sent at once before I(rate_limit) applies.
+        type: int
+        default: 10
+        required: false
+    max_retries:
+        description:
+            - Number of times a request throttled by the API (HTTP 429) is retried, after C(Retry-After)
+              or an exponential backoff with jitter.
+            - The number of requests in flight is halved on each throttled request and grows back on success.
+              Once the API throttled, this limit applies to the requests of every module run on the same machine
+              using the same I(cache_dir), until it grows back to I(pool_size).
+        type: int
+        default: 5
+        required: false
+    response_cache:
+        description:
+            - TTLs in seconds of the authenticated GET responses to keep in I(cache_dir), by path pattern
+              (e.g. C(/me/api/credential/*)), the most specific pattern first.
+            - Responses are cached per endpoint and consumer key, and a C(PUT), C(POST) or C(DELETE) of the
+              same consumer key invalidates every response cached for it, since routes like
+              C(/auth/currentCredential) embed the objects of other routes.
+            - A C(response_cache) block with the hits, misses and invalidations of the run is returned.
+            - Responses are not cached by default.
+        type: dict
+        default: {}
+        required: false
 requirements:
     - ovh >= 0.5
+    - ijson (optional, decodes large responses while they are downloaded)
+'''
+
+    # Options of the read-only modules which can query several accounts at once
+    ACCOUNTS = r'''
+
+options:
+    accounts:
+        description:
+            - Credentials of several accounts, possibly on different endpoints, to query at the same time
+              instead of the one of I(endpoint), I(application_key), I(application_secret) and I(consumer_key).
+            - The run lasts as long as the slowest account instead of the sum of all of them.
+            - Results are returned in an C(accounts) list, in the same order, each tagged with the I(name),
+              I(endpoint) and I(application_key) of its account and a C(failed) flag.
+            - The module fails, with the results of every account, when the query of any account failed.
+        type: list
+        elements: dict
+        required: false
+        suboptions:
+            name:
+                description:
+                    - Name of the account in the results.
+                type: str
+                required: false
+            endpoint:
+                description:
+                    - The endpoint of the account.
+                type: str
+                required: true
+            application_key:
+                description:
+                    - The Application key.
+                type: str
+                required: true
+            application_secret:
+                description:
+                    - The Application secret matching the key.
+                type: str
+                required: true
+            consumer_key:
+                description:
+                    - The consumer key of the account.
+                type: str
+                required: true
+'''
+
+    # Options of every module, to profile its runs
+    PROFILE = r'''
+
+options:
+    profile:
+        description:
+            - Profile the run with C(cpu) (cProfile, including the threads sending requests) and/or
+              C(memory) (tracemalloc).
+            - The profiles are written in I(profile_dir), and a C(profile) block with the top hotspots,
+              the peak memory usage and the path of the profiles is returned.
+            - Can also be set with the C(OVH_PROFILE) environment variable, e.g. C(cpu,memory).
+        type: list
+        elements: str
+        choices: [cpu, memory]
+        default: []
+        required: false
+    profile_dir:
+        description:
+            - Directory of the profiles, which are named after I(profile_name), the host running the module
+              and the time of the run.
+            - C(.prof) files can be read with C(python -m pstats), C(.tracemalloc) files with
+              C(tracemalloc.Snapshot.load).
+            - Can also be set with the C(OVH_PROFILE_DIR) environment variable.
+        type: path
+        default: ~/.ansible/profiles/holyhope.ovh
+        required: false
+    profile_name:
+        description:
+            - Name of the profiles.
+            - Defaults to the inventory host and the task name for the modules running on the controller,
+              to the module name for the others.
+        type: str
+        required: false
 '''
@@ -0,0 +1,184 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Optional
+
+from hmac import compare_digest
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible.plugins.httpapi import HttpApiBase
+from ansible_collections.holyhope.ovh.plugins.module_utils.cache import \
+    DEFAULT_CACHE_DIR
+
+try:
+    from ansible_collections.holyhope.ovh.plugins.module_utils.client import (
+        ENDPOINTS, get_client)
+    HAS_OVH = True
+except ImportError:
+    HAS_OVH = False
+
+DOCUMENTATION = '''
+---
+name: ovh
+version_added: "1.1.0"
+short_description: Persistent session to the OVHcloud API
+description:
+    - Keeps an authenticated client to the OVHcloud API in the persistent connection process of
+      C(ansible.netcommon.httpapi), so that every task of a host reuses its keep-alive connections,
+      clock delta and rate limit instead of setting them up again.
+    - Modules of this collection send their requests through this session when they run with
+      C(ansible_connection=ansible.netcommon.httpapi) and C(ansible_network_os=holyhope.ovh.ovh).
+      Their I(endpoint), I(application_key), I(application_secret) and I(consumer_key) then default to the
+      ones of the connection. Modules setting another endpoint or application use their own client instead.
+      Modules using the session have their client options (I(pool_size), I(rate_limit), I(response_cache)...)
+      replaced by the defaults of the session.
+options:
+    endpoint:
+        description:
+            - The endpoint to communicate with ovh. See https://github.com/ovh/python-ovh#configuration
+        type: str
+        vars:
+            - name: ansible_ovh_endpoint
+        env:
+            - name: OVH_ENDPOINT
+    application_key:
+        description:
+            - The Application key created thanks to https://api.ovh.com/createApp
+        type: str
+        vars:
+            - name: ansible_ovh_application_key
+        env:
+            - name: OVH_APPLICATION_KEY
+    application_secret:
+        description:
+            - The Application secret matching the key
+        type: str
+        vars:
+            - name: ansible_ovh_application_secret
+        env:
+            - name: OVH_APPLICATION_SECRET
+    consumer_key:
+        description:
+            - Consumer key used when modules do not set one.
+        type: str
+        vars:
+            - name: ansible_ovh_consumer_key
+        env:
+            - name: OVH_CONSUMER_KEY
+    cache_dir:
+        description:
+            - Directory of the cache shared by the module runs on the same machine.
+        type: path
+        default: ~/.ansible/cache/holyhope.ovh
+        vars:
+            - name: ansible_ovh_cache_dir
+        env:
+            - name: OVH_CACHE_DIR
+requirements:
+    - ansible.netcommon
+    - ovh >= 0.5
+author:
+    - Pierre PÉRONNET <pierre.peronnet@ovhcloud.com>
+'''
+
+EXAMPLES = '''
+# inventory
+[ovh]
+api ansible_host=localhost
+
+[ovh:vars]
+ansible_connection=ansible.netcommon.httpapi
+ansible_network_os=holyhope.ovh.ovh
+ansible_ovh_endpoint=ovh-eu
+ansible_ovh_application_key=abcde
+ansible_ovh_application_secret=abcde
+ansible_ovh_consumer_key=abcde
+'''
+
+
+class HttpApi(HttpApiBase):
+    def login(self, username, password):
+        '''
+        Opens the session: the client is created and its clock delta fetched once for every task.
+        '''
+        if not HAS_OVH:
+            raise AnsibleConnectionFailure('The ovh python library is required for the holyhope.ovh.ovh httpapi plugin')
+
+        # Options are not declared as required: the connection sets them after the ones of its own.
+        missing = [name for name in ('endpoint', 'application_key', 'application_secret') if not self.get_option(name)]
+        if missing:
+            raise AnsibleConnectionFailure('missing required options of the holyhope.ovh.ovh httpapi plugin: %s'
+                                           % ', '.join(missing))
+
+        endpoint = self.get_option('endpoint')
+        if endpoint not in ENDPOINTS:
+            raise AnsibleConnectionFailure('endpoint must be one of %s, got %s' % (', '.join(ENDPOINTS), endpoint))
+
+        self.client(None).time_delta
+
+    def client(self, consumer_key: 'Optional[str]'):
+        return get_client(
+            endpoint=self.get_option('endpoint'),
+            application_key=self.get_option('application_key'),
+            application_secret=self.get_option('application_secret'),
+            consumer_key=consumer_key or self.get_option('consumer_key'),
+            cache_dir=self.get_option('cache_dir') or DEFAULT_CACHE_DIR,
+        )
+
+    def ovh_session_matches(self, endpoint: 'Optional[str]' = None, application_key: 'Optional[str]' = None,
+                            application_secret: 'Optional[str]' = None) -> bool:
+        '''
+        Returns whether the session uses the given endpoint and application, unset values matching any.
+
+        The secret is compared here, so that it is never sent back to modules.
+        '''
+        expected = dict(endpoint=endpoint, application_key=application_key, application_secret=application_secret)
+
+        return all(
+            value is None or compare_digest(str(value), str(self.get_option(name) or ''))
+            for name, value in expected.items()
+        )
+
+    def ovh_request(self, method: str, path: str, params: 'Any' = None, need_auth: bool = True,
+                    consumer_key: 'Optional[str]' = None) -> 'Dict[str,Any]':
+        '''
+        Sends a request with the client of consumer_key, and returns its result or its error.
+
+        params are the query string parameters of a GET or a DELETE, and the body of the other methods,
+        sent unchanged since it may be any JSON value.
+
+        API errors are returned instead of raised, so that modules can raise the matching ovh exception.
+        '''
+        from ovh.exceptions import APIError
+
+        client = self.client(consumer_key)
+
+        try:
+            if method == 'GET':
+                result = client.get(path, _need_auth=need_auth, **(params or {}))
+            elif method == 'DELETE':
+                result = client.delete(path, _need_auth=need_auth, **(params or {}))
+            else:
+                result = client.call(method, path, params, need_auth)
+        except APIError as e:
+            response = getattr(e, 'response', None)
+            return dict(error=type(e).__name__, msg=str(e), status=response.status_code if response is not None else 0)
+
+        return dict(result=result)
+
+    def send_request(self, data, **message_kwargs):
+        return self.ovh_request(
+            message_kwargs.get('method', 'GET'),
+            message_kwargs['path'],
+            data,
+            message_kwargs.get('need_auth', True),
+            message_kwargs.get('consumer_key'),
+        )
@@ -0,0 +1,208 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import Any, Dict
+
+from ansible.errors import AnsibleError
+from ansible.plugins.inventory import (BaseInventoryPlugin, Cacheable,
+                                       Constructable)
+from ansible_collections.holyhope.ovh.plugins.module_utils.cache import \
+    DEFAULT_CACHE_DIR
+from ansible_collections.holyhope.ovh.plugins.module_utils.parallel import \
+    imap_bounded
+
+try:
+    from ansible_collections.holyhope.ovh.plugins.module_utils.client import (
+        ENDPOINTS, get_client)
+    HAS_OVH = True
+except ImportError:
+    HAS_OVH = False
+
+DOCUMENTATION = '''
+---
+name: ovh
+version_added: "1.1.0"
+short_description: OVHcloud inventory source
+description:
+    - Get hosts from the services of an OVHcloud account.
+    - Each service listed by I(resources) becomes a host, in a group named after the resource.
+    - API credentials and applications of the account can be exposed on the C(ovh) group, see I(credentials).
+    - Uses a YAML configuration file that ends with C(ovh.yml) or C(ovh.yaml).
+options:
+    plugin:
+        description:
+            - Token that ensures this is a source file for the plugin.
+        required: true
+        choices: ['holyhope.ovh.ovh']
+    endpoint:
+        description:
+            - The endpoint to communicate with ovh. See https://github.com/ovh/python-ovh#configuration
+        required: true
+        env:
+            - name: OVH_ENDPOINT
+    application_key:
+        description:
+            - The Application key created thanks to https://api.ovh.com/createApp
+        required: true
+        env:
+            - name: OVH_APPLICATION_KEY
+    application_secret:
+        description:
+            - The Application secret matching the key
+        required: true
+        env:
+            - name: OVH_APPLICATION_SECRET
+    consumer_key:
+        description:
+            - Consumer key used by Ansible o communicate with OVHcloud API.
+        required: true
+        env:
+            - name: OVH_CONSUMER_KEY
+    resources:
+        description:
+            - API paths listing the services to add as hosts, keyed by group name.
+            - The details of each service are fetched from C(<path>/<service name>) and stored in C(ovh_resource).
+        type: dict
+        default:
+            dedicated_servers: /dedicated/server
+            vps: /vps
+    credentials:
+        description:
+            - Whether to fetch the API credentials and applications of the account, and to set their full
+              details in the C(ovh_credentials) and C(ovh_applications) variables of the C(ovh) group.
+            - They then show up in the output of C(ansible-inventory --list) and in the inventory cache.
+        type: bool
+        default: false
+    concurrency:
+        description:
+            - Maximum number of details fetched at the same time.
+        type: int
+        default: 10
+extends_documentation_fragment:
+    - inventory_cache
+    - constructed
+requirements:
+    - ovh >= 0.5
+author:
+    - Pierre PÉRONNET <pierre.peronnet@ovhcloud.com>
+'''
+
+EXAMPLES = '''
+# ovh.yml
+plugin: holyhope.ovh.ovh
+endpoint: ovh-eu
+resources:
+    dedicated_servers: /dedicated/server
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.ansible/cache/inventory
+cache_timeout: 3600
+keyed_groups:
+    - key: ovh_resource.datacenter
+      prefix: datacenter
+'''
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+    NAME = 'holyhope.ovh.ovh'
+
+    def verify_file(self, path: str) -> bool:
+        return super().verify_file(path) and path.endswith(('ovh.yml', 'ovh.yaml'))
+
+    def parse(self, inventory, loader, path, cache=True):
+        super().parse(inventory, loader, path, cache)
+
+        if not HAS_OVH:
+            raise AnsibleError('The ovh python library is required for the holyhope.ovh.ovh inventory plugin')
+
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        user_cache_setting = self.get_option('cache')
+        attempt_to_read_cache = user_cache_setting and cache
+        cache_needs_update = user_cache_setting and not cache
+
+        results = None
+        if attempt_to_read_cache:
+            try:
+                results = self._cache[cache_key]
+            except KeyError:
+                cache_needs_update = True
+
+        if results is None:
+            results = self.fetch()
+
+        if cache_needs_update:
+            self._cache[cache_key] = results
+
+        self.populate(results)
+
+    @property
+    def client(self):
+        endpoint = self.get_option('endpoint')
+        if endpoint not in ENDPOINTS:
+            raise AnsibleError('endpoint must be one of %s, got %s' % (', '.join(ENDPOINTS), endpoint))
+
+        return get_client(
+            endpoint=endpoint,
+            application_key=self.get_option('application_key'),
+            application_secret=self.get_option('application_secret'),
+            consumer_key=self.get_option('consumer_key'),
+            cache_dir=DEFAULT_CACHE_DIR,
+        )
+
+    def fetch(self) -> 'Dict[str,Any]':
+        results: 'Dict[str,Any]' = dict(resources={})
+
+        for group, path in self.get_option('resources').items():
+            results['resources'][group] = self.fetch_details(path.rstrip('/'))
+
+        if self.get_option('credentials'):
+            results['credentials'] = self.fetch_details('/me/api/credential')
+            results['applications'] = self.fetch_details('/me/api/application')
+
+        return results
+
+    def fetch_details(self, path: str) -> 'Dict[str,Any]':
+        client = self.client
+
+        details: 'Dict[str,Any]' = {}
+        for name, detail, error in imap_bounded(lambda name: client.get('%s/%s' % (path, name)),
+                                                client.get(path), self.get_option('concurrency')):
+            if error is not None:
+                raise AnsibleError('failed to fetch %s/%s: %s' % (path, name, error))
+
+            details[str(name)] = detail
+
+        return details
+
+    def populate(self, results: 'Dict[str,Any]'):
+        self.inventory.add_group('ovh')
+
+        if 'credentials' in results:
+            self.inventory.set_variable('ovh', 'ovh_credentials', results['credentials'])
+            self.inventory.set_variable('ovh', 'ovh_applications', results['applications'])
+
+        strict = self.get_option('strict')
+
+        for group, resources in results['resources'].items():
+            self.inventory.add_group(group)
+            self.inventory.add_child('ovh', group)
+
+            for name, resource in resources.items():
+                self.inventory.add_host(name, group=group)
+                self.inventory.set_variable(name, 'ovh_resource', resource)
+                self.inventory.set_variable(name, 'ovh_resource_type', group)
+
+                variables = self.inventory.get_host(name).get_vars()
+                self._set_composite_vars(self.get_option('compose'), variables, name, strict=strict)
+                self._add_host_to_composed_groups(self.get_option('groups'), variables, name, strict=strict)
+                self._add_host_to_keyed_groups(self.get_option('keyed_groups'), variables, name, strict=strict)
@@ -0,0 +1,149 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import Any
+
+import os
+
+from ansible import constants as C
+from ansible.errors import AnsibleError
+from ansible.plugins.lookup import LookupBase
+from ansible_collections.holyhope.ovh.plugins.module_utils.cache import (
+    DEFAULT_CACHE_DIR, FileCache, LRUCache)
+
+try:
+    from ansible_collections.holyhope.ovh.plugins.module_utils.client import (
+        ENDPOINTS, get_client)
+    HAS_OVH = True
+except ImportError:
+    HAS_OVH = False
+
+DOCUMENTATION = '''
+---
+name: api
+version_added: "1.1.0"
+short_description: Read the OVHcloud API
+description:
+    - Performs signed GET requests from the controller and returns their responses.
+    - Responses are memoized for the duration of the play, so evaluating the same lookup for many hosts
+      and tasks costs a single API call.
+options:
+    _terms:
+        description:
+            - The API paths to get.
+        required: true
+    endpoint:
+        description:
+            - The endpoint to communicate with ovh. See https://github.com/ovh/python-ovh#configuration
+        required: true
+        env:
+            - name: OVH_ENDPOINT
+    application_key:
+        description:
+            - The Application key created thanks to https://api.ovh.com/createApp
+        required: true
+        env:
+            - name: OVH_APPLICATION_KEY
+    application_secret:
+        description:
+            - The Application secret matching the key
+        required: true
+        env:
+            - name: OVH_APPLICATION_SECRET
+    consumer_key:
+        description:
+            - Consumer key used by Ansible o communicate with OVHcloud API.
+        required: true
+        env:
+            - name: OVH_CONSUMER_KEY
+    cache_size:
+        description:
+            - Maximum number of responses memoized in memory.
+        type: int
+        default: 128
+    cache_ttl:
+        description:
+            - Seconds during which a response is reused. Set to 0 to disable memoization.
+        type: int
+        default: 60
+requirements:
+    - ovh >= 0.5
+author:
+    - Pierre PÉRONNET <pierre.peronnet@ovhcloud.com>
+'''
+
+EXAMPLES = '''
+    - name: Skip validated credentials
+      ansible.builtin.debug:
+        msg: "Credential is {{ credential.status }}"
+      vars:
+        credential: "{{ lookup('holyhope.ovh.api', '/auth/currentCredential', endpoint='ovh-eu') }}"
+'''
+
+RETURN = '''
+_raw:
+    description:
+        - The API response of each path.
+    type: list
+'''
+
+CACHE_NAMESPACE = 'lookup'
+
+# Workers are forked from the main process, which owns the local temporary directory: memoized
+# responses are kept in memory and in this directory, so that every fork of the run shares them.
+_MEMORY = LRUCache(size=128, ttl=60)
+
+
+class LookupModule(LookupBase):
+    def run(self, terms, variables=None, **kwargs):
+        if not HAS_OVH:
+            raise AnsibleError('The ovh python library is required for the holyhope.ovh.api lookup plugin')
+
+        self.set_options(var_options=variables, direct=kwargs)
+
+        endpoint = self.get_option('endpoint')
+        if endpoint not in ENDPOINTS:
+            raise AnsibleError('endpoint must be one of %s, got %s' % (', '.join(ENDPOINTS), endpoint))
+
+        _MEMORY.size = self.get_option('cache_size')
+        _MEMORY.ttl = self.get_option('cache_ttl')
+
+        client = get_client(
+            endpoint=endpoint,
+            application_key=self.get_option('application_key'),
+            application_secret=self.get_option('application_secret'),
+            consumer_key=self.get_option('consumer_key'),
+            cache_dir=DEFAULT_CACHE_DIR,
+        )
+        shared = FileCache(os.path.join(C.DEFAULT_LOCAL_TMP, 'holyhope.ovh'))
+
+        return [self.get(client, shared, term) for term in terms]
+
+    def get(self, client, shared: FileCache, path: str) -> 'Any':
+        key = '\n'.join((client._endpoint, client._application_key, client._consumer_key or '', path))
+
+        value = _MEMORY.get(key)
+        if value is not None:
+            return value
+
+        value = shared.get(CACHE_NAMESPACE, key)
+        if value is None:
+            try:
+                value = client.get(path)
+            except Exception as e:
+                raise AnsibleError('failed to get %s: %s' % (path, e))
+
+            if _MEMORY.ttl > 0:
+                shared.set(CACHE_NAMESPACE, key, value, ttl=_MEMORY.ttl)
+
+        _MEMORY.set(key, value)
+
+        return value
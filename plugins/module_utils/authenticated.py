@@ -3,31 +3,64 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 try:
-    import importlib
+    from typing import TYPE_CHECKING
 except ImportError:
-    # This passes the sanity import test, but does not provide a user friendly error message.
-    # Doing so would require catching Exception for all imports of dependencies in modules and module_utils.
-    importlib = None  # type: ignore # noqa
+    TYPE_CHECKING = False
 
 
 from ansible_collections.holyhope.ovh.plugins.module_utils.common import \
     OVHModuleBase
+from ansible_collections.holyhope.ovh.plugins.module_utils.parallel import \
+    imap_bounded
 
-try:
-    from ovh import client as ovh
-except ImportError:
-    ovh = object
-    ovh.Client = object
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, List
+
+    from ansible_collections.holyhope.ovh.plugins.module_utils.client import \
+        Client
 
 
 COMMON_ARGS = dict(
     consumer_key=dict(
         type='str',
-        required=True,
+        required=False,
         no_log=True,
     ),
 )
 
+# Merged in the argument spec of the read-only modules which can query several accounts at once.
+ACCOUNTS_ARGS = dict(
+    accounts=dict(
+        type='list',
+        elements='dict',
+        required=False,
+        options=dict(
+            name=dict(
+                type='str',
+                required=False,
+            ),
+            endpoint=dict(
+                type='str',
+                required=True,
+            ),
+            application_key=dict(
+                type='str',
+                required=True,
+            ),
+            application_secret=dict(
+                type='str',
+                required=True,
+                no_log=True,
+            ),
+            consumer_key=dict(
+                type='str',
+                required=True,
+                no_log=True,
+            ),
+        ),
+    ),
+)
+
 
 class AuthenticatedOVHModuleBase(OVHModuleBase):
     def __init__(self, derived_arg_spec, *args, **kwargs):
@@ -41,5 +74,49 @@ class AuthenticatedOVHModuleBase(OVHModuleBase):
         super().__init__(derived_arg_spec=merged_arg_spec, *args, **kwargs)
 
     @property
-    def client(self) -> ovh.Client:
+    def client(self) -> 'Client':
         return self.delegated_client(self.consumer_key)
+
+    def required_credentials(self) -> 'List[str]':
+        return super().required_credentials() + ['consumer_key']
+
+    def exec_accounts(self, query: 'Callable[[Client], Dict[str,Any]]'):
+        '''
+        Runs query with the client of every account of accounts at the same time, so that the run lasts as
+        long as the slowest account, and returns their results in an accounts list, in the same order.
+
+        Each result is tagged with the name, endpoint and application_key of its account. An account whose
+        query raised, or returned errors, is marked as failed and fails the module once all are done.
+        '''
+        from ansible_collections.holyhope.ovh.plugins.module_utils.client import \
+            ENDPOINTS
+
+        for account in self.accounts:
+            if account['endpoint'] not in ENDPOINTS:
+                self.fail("value of endpoint must be one of: %s, got: %s in accounts"
+                          % (', '.join(ENDPOINTS), account['endpoint']))
+
+        def run(index: int) -> 'Dict[str,Any]':
+            account = self.accounts[index]
+            return query(self.new_client(account['endpoint'], account['application_key'],
+                                         account['application_secret'], account['consumer_key']))
+
+        results: 'List[Dict[str,Any]]' = [{} for _ in self.accounts]
+
+        for index, result, error in imap_bounded(run, range(len(self.accounts)), len(self.accounts)):
+            account = self.accounts[index]
+
+            tagged = dict(name=account['name'], endpoint=account['endpoint'],
+                          application_key=account['application_key'], failed=False)
+            if error is not None:
+                tagged.update(failed=True, msg=str(error))
+            else:
+                tagged.update(result, failed=bool(result.get('errors')))
+
+            results[index] = tagged
+
+        self.results['accounts'] = results
+
+        failed = [result for result in results if result['failed']]
+        if failed:
+            self.fail("failed to query %d of %d account(s)" % (len(failed), len(results)), **self.results)
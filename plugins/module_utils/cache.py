@@ -0,0 +1,237 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Optional
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from threading import Lock
+
+DEFAULT_CACHE_DIR = '~/.ansible/cache/holyhope.ovh'
+
+
+class FileCache(object):
+    '''
+    Small on-disk cache shared by every module run on the same machine.
+
+    Each entry is stored in its own JSON file, written atomically, with its expiration date.
+
+    >>> import tempfile
+    >>> cache = FileCache(tempfile.mkdtemp())
+    >>> cache.get('time_delta', 'ovh-eu') is None
+    True
+    >>> cache.set('time_delta', 'ovh-eu', 3, ttl=60)
+    >>> cache.get('time_delta', 'ovh-eu')
+    3
+    >>> cache.delete('time_delta', 'ovh-eu')
+    >>> cache.get('time_delta', 'ovh-eu') is None
+    True
+    >>> cache.set('time_delta', 'ovh-eu', 3, ttl=-1)
+    >>> cache.get('time_delta', 'ovh-eu') is None
+    True
+    '''
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR):
+        self.directory = os.path.expanduser(directory)
+
+    def _path(self, namespace: str, key: str) -> str:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, namespace, digest + '.json')
+
+    def get(self, namespace: str, key: str) -> 'Any':
+        path = self._path(namespace, key)
+
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if entry.get('expires', 0) < time.time():
+            self.delete(namespace, key)
+            return None
+
+        return entry.get('value')
+
+    def set(self, namespace: str, key: str, value: 'Any', ttl: float):
+        path = self._path(namespace, key)
+        directory = os.path.dirname(path)
+
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dict(expires=time.time() + ttl, value=value), f)
+
+            os.replace(tmp, path)
+        except (IOError, OSError):
+            # The cache is an optimization: never fail a module run because of it.
+            pass
+
+    def delete(self, namespace: str, key: str):
+        try:
+            os.unlink(self._path(namespace, key))
+        except (IOError, OSError):
+            pass
+
+
+class LRUCache(object):
+    '''
+    In-process cache keeping at most size entries, each one for ttl seconds.
+
+    >>> cache = LRUCache(size=2, ttl=60)
+    >>> cache.set('a', 1)
+    >>> cache.set('b', 2)
+    >>> cache.get('a')
+    1
+    >>> cache.set('c', 3)
+    >>> cache.get('b') is None
+    True
+    >>> sorted(cache.keys())
+    ['a', 'c']
+    >>> LRUCache(size=2, ttl=0).get('a') is None
+    True
+    '''
+
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+
+        self._entries: 'OrderedDict[Any, Any]' = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: 'Any') -> 'Any':
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires, value = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: 'Any', value: 'Any'):
+        if self.size <= 0 or self.ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+
+class ResponseCache(object):
+    '''
+    Cache of API responses, stored in a FileCache for the TTL of the first pattern of ttls matching
+    their path, the most specific pattern first.
+
+    A write invalidates every response of its owner: routes like /auth/currentCredential embed
+    the objects of other routes, so no path-based rule can tell which responses it changed.
+
+    Counts hits, misses and invalidations of the current module run.
+
+    >>> import tempfile
+    >>> cache = ResponseCache(FileCache(tempfile.mkdtemp()), {'/me/api/credential/*': 60, '/auth/*': 60, '/me/*': 0})
+    >>> cache.ttl('/me/api/credential/1?fields=rules'), cache.ttl('/me/api/credential'), cache.ttl('/time')
+    (60, 0, 0)
+    >>> cache.get('ck', '/me/api/credential/1') is None
+    True
+    >>> cache.set('ck', '/me/api/credential/1', dict(credentialId=1))
+    >>> cache.set('ck', '/auth/currentCredential', dict(credentialId=1, allowedIPs=None))
+    >>> cache.set('other', '/auth/currentCredential', dict(credentialId=2))
+    >>> cache.get('ck', '/me/api/credential/1')
+    {'credentialId': 1}
+    >>> cache.invalidate('ck', '/me/api/credential/1')
+    >>> cache.get('ck', '/me/api/credential/1') is None, cache.get('ck', '/auth/currentCredential') is None
+    (True, True)
+    >>> cache.get('other', '/auth/currentCredential')
+    {'credentialId': 2}
+    >>> cache.counters()
+    {'hits': 2, 'misses': 3, 'invalidations': 1}
+    '''
+
+    NAMESPACE = 'responses'
+
+    def __init__(self, files: FileCache, ttls: 'Dict[str,int]', prefix: str = ''):
+        self.files = files
+        self.prefix = prefix
+        self.ttls = sorted(ttls.items(), key=lambda item: len(item[0]), reverse=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = Lock()
+
+    def ttl(self, path: str) -> int:
+        path = path.split('?', 1)[0]
+
+        for pattern, ttl in self.ttls:
+            if fnmatchcase(path, pattern):
+                return ttl
+
+        return 0
+
+    def get(self, owner: 'Optional[str]', path: str) -> 'Any':
+        value = self.files.get(self.NAMESPACE, self._key(owner, path))
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return value
+
+    def set(self, owner: 'Optional[str]', path: str, value: 'Any'):
+        ttl = self.ttl(path)
+        if ttl > 0:
+            self.files.set(self.NAMESPACE, self._key(owner, path), value, ttl=ttl)
+
+    def invalidate(self, owner: 'Optional[str]', path: str):
+        '''
+        Forgets every response of owner after a write to path.
+        '''
+        ttl = max([ttl for _, ttl in self.ttls] + [0])
+        if ttl > 0:
+            # Responses are keyed by the generation of their owner: a new one hides them all, across
+            # module runs, and the older responses expire by themselves.
+            self.files.set(self.NAMESPACE, self._generation_key(owner), uuid.uuid4().hex, ttl=ttl)
+
+        with self._lock:
+            self.invalidations += 1
+
+    def counters(self) -> 'Dict[str,int]':
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, invalidations=self.invalidations)
+
+    def _generation_key(self, owner: 'Optional[str]') -> str:
+        return '\n'.join((self.prefix, owner or ''))
+
+    def _key(self, owner: 'Optional[str]', path: str) -> str:
+        generation = self.files.get(self.NAMESPACE, self._generation_key(owner)) or ''
+        return '\n'.join((self.prefix, owner or '', generation, path))
@@ -0,0 +1,445 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import IO, Any, Callable, Dict, Iterator, Optional, Tuple
+
+    from ansible_collections.holyhope.ovh.plugins.module_utils.streaming import \
+        Folds
+
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+from io import BytesIO
+from threading import Lock, local
+
+from ansible_collections.holyhope.ovh.plugins.module_utils.cache import (
+    FileCache, ResponseCache)
+from ansible_collections.holyhope.ovh.plugins.module_utils.common import (
+    DEFAULT_POOL_SIZE, DEFAULT_TIME_DELTA_TTL)
+from ansible_collections.holyhope.ovh.plugins.module_utils.ratelimit import (
+    DEFAULT_MAX_RETRIES, DEFAULT_RATE_BURST, DEFAULT_RATE_LIMIT,
+    AdaptiveConcurrency, RateLimiter, backoff, retry_after)
+from ansible_collections.holyhope.ovh.plugins.module_utils.stats import \
+    ApiStats
+from ansible_collections.holyhope.ovh.plugins.module_utils.streaming import (
+    decode_folded, fold, iter_items)
+
+from ovh import client as ovh
+from ovh.exceptions import BadParametersError
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+ENDPOINTS = ovh.ENDPOINTS
+
+TIME_DELTA_NAMESPACE = 'time_delta'
+# Time deltas looked up by this process, and the locks of their lookups, by endpoint.
+_TIME_DELTAS: 'Dict[str,int]' = {}
+_TIME_DELTA_LOCKS: 'Dict[str,Lock]' = {}
+_TIME_DELTA_LOCKS_LOCK = Lock()
+RATE_LIMIT_NAMESPACE = 'ratelimit'
+
+
+class Client(ovh.Client):
+    '''
+    ovh.Client persisting the time delta of its endpoint between module runs.
+
+    The delta is read from the cache instead of requesting /auth/time, and is refreshed
+    once when the API rejects the timestamp of a signed request.
+
+    Requests are paced by rate_limiter, and throttled ones (429) are retried up to max_retries times
+    while the number of requests in flight adapts to the throttling.
+
+    Every HTTP request is recorded in stats, when set, and authenticated GET responses
+    are served from response_cache, which writes of the same client invalidate.
+
+    Responses are gzip compressed, and get_folded and iter_get decode them while they are downloaded.
+    '''
+
+    _time_delta: 'Optional[int]'
+
+    def __init__(self, endpoint: str, *args, time_delta_cache: 'Optional[FileCache]' = None,
+                 time_delta_ttl: int = DEFAULT_TIME_DELTA_TTL, stats: 'Optional[ApiStats]' = None,
+                 rate_limiter: 'Optional[RateLimiter]' = None, max_retries: int = DEFAULT_MAX_RETRIES,
+                 concurrency: int = DEFAULT_POOL_SIZE, response_cache: 'Optional[ResponseCache]' = None,
+                 **kwargs):
+        super().__init__(endpoint, *args, **kwargs)
+
+        self._endpoint_name = endpoint
+        self._time_delta_cache = time_delta_cache if time_delta_ttl > 0 else None
+        self._time_delta_ttl = time_delta_ttl
+        self._local = local()
+
+        self.stats = stats
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        # Only a limiter with a state file shares the concurrency limit with the other processes.
+        self.concurrency = AdaptiveConcurrency(
+            concurrency, self.rate_limiter.state if self.rate_limiter.path is not None else None)
+        self.response_cache = response_cache
+
+    @property
+    def time_delta(self) -> int:
+        if self._time_delta is not None:
+            return self._time_delta
+
+        published = _TIME_DELTAS.get(self._endpoint_name)
+        if published is not None:
+            self._time_delta = published
+            return published
+
+        # Concurrent requests of a bulk run, even through clients of different consumer keys,
+        # must share a single /auth/time lookup per endpoint, without waiting for the other endpoints.
+        with _TIME_DELTA_LOCKS_LOCK:
+            lock = _TIME_DELTA_LOCKS.setdefault(self._endpoint_name, Lock())
+
+        with lock:
+            time_delta = _TIME_DELTAS.get(self._endpoint_name)
+
+            if time_delta is None and self._time_delta_cache is not None:
+                time_delta = self._time_delta_cache.get(TIME_DELTA_NAMESPACE, self._endpoint_name)
+
+            if time_delta is None:
+                server_time = self.get('/auth/time', _need_auth=False)
+                time_delta = server_time - int(time.time())
+
+                if self._time_delta_cache is not None:
+                    self._time_delta_cache.set(TIME_DELTA_NAMESPACE, self._endpoint_name, time_delta,
+                                               ttl=self._time_delta_ttl)
+
+            _TIME_DELTAS[self._endpoint_name] = time_delta
+
+        self._time_delta = time_delta
+        return time_delta
+
+    def invalidate_time_delta(self):
+        self._time_delta = None
+        _TIME_DELTAS.pop(self._endpoint_name, None)
+
+        if self._time_delta_cache is not None:
+            self._time_delta_cache.delete(TIME_DELTA_NAMESPACE, self._endpoint_name)
+
+    def get_folded(self, _target: str, _folds: 'Folds', **kwargs) -> 'Any':
+        '''
+        Like get, but the arrays at the top-level keys of _folds are passed as iterators to their fold,
+        whose result replaces them: large arrays are reduced while they are decoded.
+        '''
+        if self.response_cache is not None and self.response_cache.ttl(_target) > 0:
+            # Cached responses are stored as returned by the API.
+            return fold(self.get(_target, **kwargs), _folds)
+
+        def decode(body: 'IO[bytes]') -> 'Any':
+            with releasing(body):
+                return decode_folded(body, _folds)
+
+        return self._decoded_get(decode, _target, **kwargs)
+
+    def iter_get(self, _target: str, **kwargs) -> 'Iterator[Any]':
+        '''
+        Like get for a path returning an array, but its elements are yielded while they are decoded.
+        '''
+        if self.response_cache is not None and self.response_cache.ttl(_target) > 0:
+            return iter(self.get(_target, **kwargs))
+
+        def decode(body: 'IO[bytes]') -> 'Iterator[Any]':
+            with releasing(body):
+                yield from iter_items(body)
+
+        return self._decoded_get(decode, _target, **kwargs)
+
+    def _decoded_get(self, decoder: 'Callable[[IO[bytes]], Any]', _target: str, **kwargs) -> 'Any':
+        self._local.decoder = decoder
+        try:
+            return self.get(_target, **kwargs)
+        finally:
+            self._local.decoder = None
+
+    def call(self, method: str, path: str, data: 'Any' = None, need_auth: bool = True) -> 'Any':
+        if getattr(self._local, 'decoder', None) is not None:
+            # Decoded responses are not the values returned by the API: never cache them.
+            return self._signed_call(method, path, data, need_auth)
+
+        cache = self.response_cache if need_auth else None
+        if cache is None:
+            return self._signed_call(method, path, data, need_auth)
+
+        if method.upper() == 'GET':
+            if cache.ttl(path) <= 0:
+                return self._signed_call(method, path, data, need_auth)
+
+            value = cache.get(self._consumer_key, path)
+            if value is None:
+                value = self._signed_call(method, path, data, need_auth)
+                cache.set(self._consumer_key, path, value)
+
+            return value
+
+        try:
+            return self._signed_call(method, path, data, need_auth)
+        finally:
+            # Even a failed write may have changed the resource.
+            cache.invalidate(self._consumer_key, path)
+
+    def _signed_call(self, method: str, path: str, data: 'Any' = None, need_auth: bool = True) -> 'Any':
+        self._local.retries = 0
+        try:
+            return super().call(method, path, data, need_auth)
+        except BadParametersError as e:
+            if not need_auth or not is_time_rejection(e):
+                raise
+
+        self.invalidate_time_delta()
+
+        self._local.retries = 1
+        return super().call(method, path, data, need_auth)
+
+    def raw_call(self, method: str, path: str, data: 'Any' = None, need_auth: bool = True,
+                 headers: 'Optional[Dict[str,str]]' = None):
+        # python-ovh < 1.2 has no OAuth2 support, nor _oauth2 attribute.
+        if need_auth and not getattr(self, '_oauth2', None):
+            # Fetch the time delta first: /auth/time must neither wait for a slot taken by
+            # this request nor be accounted in its latency.
+            self.time_delta
+
+        # /auth/time, fetched by unauthenticated requests, is never decoded by the decoder of a request.
+        decoder = getattr(self._local, 'decoder', None) if need_auth else None
+        streamed = decoder is not None and isinstance(self._session, StreamingSession)
+
+        # Each request sent again, after a throttling or a clock rejection, counts as one retry.
+        retried = getattr(self._local, 'retries', 0)
+        attempt = 0
+
+        while True:
+            self.rate_limiter.acquire()
+
+            with self.concurrency:
+                start = time.perf_counter()
+                try:
+                    with streaming(self._session, streamed):
+                        response = super().raw_call(method, path, data=data, need_auth=need_auth,
+                                                    headers=dict(headers) if headers else None)
+                except Exception:
+                    self.record(method, path, 0, start, 1 if retried or attempt else 0, 0)
+                    raise
+
+                # The body of streamed responses is not downloaded yet: count the bytes transferred instead.
+                size = int(response.headers.get('Content-Length', 0)) if streamed else len(response.content)
+                self.record(method, path, response.status_code, start, 1 if retried or attempt else 0, size)
+
+            if response.status_code != 429:
+                self.concurrency.succeeded()
+
+                if decoder is not None and 200 <= response.status_code < 300 and response.status_code != 204:
+                    set_decoder(response, decoder, streamed)
+
+                return response
+
+            self.concurrency.throttled()
+            if attempt >= self.max_retries:
+                return response
+
+            if streamed:
+                # The connection is not back to the pool until the body is read.
+                response.content
+
+            attempt += 1
+
+            # Retry-After is shared with the other module runs, the backoff only delays this request.
+            delay = retry_after(response.headers.get('Retry-After'))
+            if delay is not None:
+                self.rate_limiter.cooldown(delay)
+            else:
+                time.sleep(backoff(attempt))
+
+    def record(self, method: str, path: str, status: int, start: float, retries: int, size: int):
+        if self.stats is not None:
+            self.stats.record(method, path, status, time.perf_counter() - start, retries, size)
+
+
+class StreamingSession(Session):
+    '''
+    Session whose responses are downloaded lazily, while stream is set by the thread sending them.
+
+    Sessions are shared by the threads of bulk runs: stream is local to each of them.
+    '''
+
+    _local: 'Optional[local]' = None
+
+    @property  # type: ignore[override]
+    def stream(self) -> bool:
+        return getattr(self._local, 'stream', False)
+
+    @stream.setter
+    def stream(self, value: bool):
+        if self._local is None:
+            self._local = local()
+
+        self._local.stream = value
+
+
+@contextmanager
+def streaming(session: 'Session', enabled: bool = True):
+    if not enabled:
+        yield
+        return
+
+    session.stream = True
+    try:
+        yield
+    finally:
+        session.stream = False
+
+
+@contextmanager
+def releasing(body: 'IO[bytes]'):
+    '''
+    Returns the connection of a streamed response body to the pool once it is decoded.
+    '''
+    try:
+        yield body
+    finally:
+        # Closing the body would close the connection: read it to the end instead.
+        body.read()
+
+        release_conn = getattr(body, 'release_conn', None)
+        if release_conn is not None:
+            release_conn()
+
+
+def set_decoder(response: 'Any', decoder: 'Callable[[IO[bytes]], Any]', streamed: bool):
+    '''
+    Makes response.json, which ovh.Client decodes successful responses with, return decoder(body).
+    '''
+    if streamed:
+        body = response.raw
+        # requests only decompresses the content it reads itself.
+        body.decode_content = True
+    else:
+        body = BytesIO(response.content)
+
+    response.json = lambda **kwargs: decoder(body)
+
+
+def is_time_rejection(error: Exception) -> bool:
+    '''
+    Tells if the API refused a signed request because of its timestamp.
+    '''
+    response = getattr(error, 'response', None)
+
+    try:
+        error_code = response.json().get('errorCode') if response is not None else None
+    except ValueError:
+        error_code = None
+
+    return error_code == 'QUERY_TIME_OUT' or 'out of time' in str(error).lower()
+
+
+_LOCK = Lock()
+_SESSIONS: 'Dict[str, Session]' = {}
+_CLIENTS: 'Dict[Tuple[str, str, Optional[str]], Client]' = {}
+
+
+def get_session(endpoint: str, pool_size: int = DEFAULT_POOL_SIZE) -> 'Session':
+    '''
+    Returns the keep-alive HTTP session shared by every client of an endpoint.
+
+    Connections are pooled so that a client with and without consumer key
+    only pay a single TLS handshake.
+    '''
+    with _LOCK:
+        session = _SESSIONS.get(endpoint)
+        if session is None:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+            session = StreamingSession()
+            # Explicit, so that compressed transfers do not depend on the defaults of requests.
+            session.headers['Accept-Encoding'] = 'gzip, deflate'
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+            _SESSIONS[endpoint] = session
+
+        return session
+
+
+def get_client(endpoint: str, application_key: str, application_secret: str,
+               consumer_key: 'Optional[str]' = None, pool_size: int = DEFAULT_POOL_SIZE,
+               cache_dir: 'Optional[str]' = None, time_delta_ttl: int = DEFAULT_TIME_DELTA_TTL,
+               stats: 'Optional[ApiStats]' = None, rate_limit: float = DEFAULT_RATE_LIMIT,
+               rate_burst: int = DEFAULT_RATE_BURST, max_retries: int = DEFAULT_MAX_RETRIES,
+               response_cache: 'Optional[ResponseCache]' = None) -> Client:
+    '''
+    Returns the memoized client for (endpoint, application_key, consumer_key).
+
+    Clients of the same endpoint and application key share their rate limit with every
+    process using the same cache_dir.
+    '''
+    key = (endpoint, application_key, consumer_key)
+
+    with _LOCK:
+        client = _CLIENTS.get(key)
+
+    if client is not None:
+        if stats is not None:
+            client.stats = stats
+        if response_cache is not None:
+            client.response_cache = response_cache
+        return client
+
+    client = Client(
+        endpoint=endpoint,
+        application_key=application_key,
+        application_secret=application_secret,
+        consumer_key=consumer_key,
+        time_delta_cache=FileCache(cache_dir) if cache_dir else None,
+        time_delta_ttl=time_delta_ttl,
+        stats=stats,
+        rate_limiter=get_rate_limiter(endpoint, application_key, cache_dir, rate_limit, rate_burst),
+        max_retries=max_retries,
+        concurrency=pool_size,
+        response_cache=response_cache,
+    )
+    client._session = get_session(endpoint, pool_size)
+
+    with _LOCK:
+        return _CLIENTS.setdefault(key, client)
+
+
+def get_rate_limiter(endpoint: str, application_key: str, cache_dir: 'Optional[str]',
+                     rate: float = DEFAULT_RATE_LIMIT, burst: int = DEFAULT_RATE_BURST) -> RateLimiter:
+    '''
+    Returns the rate limiter of an application on an endpoint.
+
+    >>> get_rate_limiter('ovh-eu', 'key', None).path is None
+    True
+    >>> get_rate_limiter('ovh-eu', 'key', '/tmp').path.startswith('/tmp/ratelimit/')
+    True
+    '''
+    if not cache_dir:
+        return RateLimiter(rate=rate, burst=burst)
+
+    digest = hashlib.sha256(('%s:%s' % (endpoint, application_key)).encode('utf-8')).hexdigest()
+    path = os.path.join(os.path.expanduser(cache_dir), RATE_LIMIT_NAMESPACE, digest + '.json')
+
+    return RateLimiter(path, rate=rate, burst=burst)
+
+
+def clear_clients():
+    '''
+    Forgets every pooled client and closes their HTTP connections.
+    '''
+    with _LOCK:
+        _CLIENTS.clear()
+
+        for session in _SESSIONS.values():
+            session.close()
+
+        _SESSIONS.clear()
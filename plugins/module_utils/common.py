@@ -9,49 +9,101 @@ except ImportError:
 
 
 if TYPE_CHECKING:
-    from typing import Optional, Dict, Any
+    from typing import Optional, Dict, Any, List
 
 import traceback
 
-from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+from ansible.module_utils.basic import (AnsibleModule, env_fallback,
+                                        missing_required_lib)
 
 try:
-    import importlib
+    from importlib.util import find_spec
 except ImportError:
     # This passes the sanity import test, but does not provide a user friendly error message.
     # Doing so would require catching Exception for all imports of dependencies in modules and module_utils.
-    importlib = None  # type: ignore # noqa
+    find_spec = None  # type: ignore # noqa
 
+from ansible_collections.holyhope.ovh.plugins.module_utils.cache import (
+    DEFAULT_CACHE_DIR, FileCache, ResponseCache)
+from ansible_collections.holyhope.ovh.plugins.module_utils.profiling import (
+    PROFILE_ARGS, Profiler)
+from ansible_collections.holyhope.ovh.plugins.module_utils.ratelimit import (
+    DEFAULT_MAX_RETRIES, DEFAULT_RATE_BURST, DEFAULT_RATE_LIMIT)
+from ansible_collections.holyhope.ovh.plugins.module_utils.stats import \
+    ApiStats
+
+if TYPE_CHECKING:
+    from ansible_collections.holyhope.ovh.plugins.module_utils.client import \
+        Client
 
 OVH_MIN_RELEASE = '1.32'
-HAS_OVH = True
-HAS_OVH_EXC = None
 
-try:
-    from ovh import client as ovh
-except ImportError:
-    ovh = object
-    ovh.ENDPOINTS = {}
-    ovh.Client = object
-    HAS_OVH_EXC = traceback.format_exc()
-    HAS_OVH = False
+# python-ovh (and requests) take most of the startup time of a module: the client is
+# only imported by delegated_client, when a module actually talks to the API.
+HAS_OVH = find_spec is None or find_spec('ovh') is not None
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIME_DELTA_TTL = 3600
 
 
 COMMON_ARGS = dict(
     endpoint=dict(
         type='str',
-        required=True,
-        choices=ovh.ENDPOINTS.keys(),
+        required=False,
     ),
     application_key=dict(
         type='str',
-        required=True,
+        required=False,
     ),
     application_secret=dict(
         type='str',
-        required=True,
+        required=False,
         no_log=True,
     ),
+    pool_size=dict(
+        type='int',
+        required=False,
+        default=DEFAULT_POOL_SIZE,
+    ),
+    cache_dir=dict(
+        type='path',
+        required=False,
+        default=DEFAULT_CACHE_DIR,
+        fallback=(env_fallback, ['OVH_CACHE_DIR']),
+    ),
+    time_delta_ttl=dict(
+        type='int',
+        required=False,
+        default=DEFAULT_TIME_DELTA_TTL,
+    ),
+    api_stats=dict(
+        type='bool',
+        required=False,
+        default=False,
+        fallback=(env_fallback, ['OVH_API_STATS']),
+    ),
+    rate_limit=dict(
+        type='float',
+        required=False,
+        default=DEFAULT_RATE_LIMIT,
+        fallback=(env_fallback, ['OVH_RATE_LIMIT']),
+    ),
+    rate_burst=dict(
+        type='int',
+        required=False,
+        default=DEFAULT_RATE_BURST,
+    ),
+    max_retries=dict(
+        type='int',
+        required=False,
+        default=DEFAULT_MAX_RETRIES,
+    ),
+    response_cache=dict(
+        type='dict',
+        required=False,
+        default={},
+    ),
+    **PROFILE_ARGS
 )
 
 
@@ -81,18 +133,23 @@ class OVHModuleBase(object):
         self.check_mode = self.module.check_mode
 
         if not HAS_OVH:
-            self.fail(
-                msg=missing_required_lib('ovh (ovh >= {0})'.format(OVH_MIN_RELEASE)),
-                exception=HAS_OVH_EXC)
+            self.fail(msg=missing_required_lib('ovh (ovh >= {0})'.format(OVH_MIN_RELEASE)))
 
         self.facts_module = facts_module
+        self.stats = ApiStats() if self.module.params.get('api_stats') else None
+        self.responses = self.init_response_cache(self.module.params.get('response_cache'))
+        self.profiler = Profiler.from_params(self.module.params, self.module._name)
+        self._uses_session: 'Optional[bool]' = None
 
         self.init_results()
 
         if not skip_exec:
+            if self.profiler is not None:
+                self.profiler.start()
+
             self.exec_module(**self.module.params)
 
-        self.module.exit_json(**self.results)
+        self.module.exit_json(**self.with_stats(self.results))
 
     def __getattribute__(self, attribute: str) -> 'Any':
         try:
@@ -103,6 +160,17 @@ class OVHModuleBase(object):
     def init_results(self):
         self.results = dict(changed=False)
 
+    def init_response_cache(self, ttls: 'Optional[Dict[str,Any]]') -> 'Optional[ResponseCache]':
+        if not ttls:
+            return None
+
+        try:
+            ttls = {pattern: int(ttl) for pattern, ttl in ttls.items()}
+        except (TypeError, ValueError):
+            self.fail("values of response_cache must be TTLs in seconds, got: %s" % ttls)
+
+        return ResponseCache(FileCache(self.module.params['cache_dir']), ttls, prefix=self.module.params['endpoint'] or '')
+
     def exec_module(self, **kwargs):
         self.fail("Error: {0} failed to implement exec_module method.".format(self.__class__.__name__))
 
@@ -116,7 +184,24 @@ class OVHModuleBase(object):
         :param kwargs: Any key=value pairs
         :return: None
         '''
-        self.module.fail_json(msg=msg, **kwargs)
+        self.module.fail_json(msg=msg, **self.with_stats(kwargs))
+
+    def with_stats(self, results: 'Dict[str,Any]') -> 'Dict[str,Any]':
+        '''
+        Adds the api_stats, response_cache and profile blocks to the results when requested.
+        '''
+        results = dict(results)
+
+        if self.stats is not None:
+            results['api_stats'] = self.stats.summary()
+
+        if self.responses is not None:
+            results['response_cache'] = self.responses.counters()
+
+        if self.profiler is not None:
+            results['profile'] = self.profiler.stop()
+
+        return results
 
     def log(self, msg, log_args: 'Optional[Dict[str,Any]]'):
         self.module.log(msg, log_args)
@@ -125,13 +210,80 @@ class OVHModuleBase(object):
         self.module.debug(msg)
 
     @property
-    def client(self) -> ovh.Client:
+    def client(self) -> 'Client':
         return self.delegated_client(self.consumer_key)
 
-    def delegated_client(self, consumer_key: 'Optional[str]' = None) -> ovh.Client:
-        return ovh.Client(
-            endpoint=self.endpoint,
-            application_key=self.application_key,
-            application_secret=self.application_secret,
-            consumer_key=consumer_key
+    def required_credentials(self) -> 'List[str]':
+        '''
+        Returns the arguments needed to talk to the API without the persistent session of the httpapi plugin.
+        '''
+        return ['endpoint', 'application_key', 'application_secret']
+
+    def delegated_client(self, consumer_key: 'Optional[str]' = None) -> 'Client':
+        if self.uses_session():
+            # Running through the holyhope.ovh.ovh httpapi plugin: reuse its persistent session.
+            from ansible_collections.holyhope.ovh.plugins.module_utils.persistent import \
+                PersistentClient
+
+            return PersistentClient(self.module._socket_path, consumer_key, stats=self.stats)  # type: ignore
+
+        missing = [name for name in self.required_credentials() if not self.module.params.get(name)]
+        if missing:
+            self.fail("missing required arguments: %s" % ', '.join(missing))
+
+        try:
+            from ansible_collections.holyhope.ovh.plugins.module_utils.client import \
+                ENDPOINTS
+        except ImportError:
+            self.fail(
+                msg=missing_required_lib('ovh (ovh >= {0})'.format(OVH_MIN_RELEASE)),
+                exception=traceback.format_exc())
+
+        if self.endpoint not in ENDPOINTS:
+            self.fail("value of endpoint must be one of: %s, got: %s" % (', '.join(ENDPOINTS), self.endpoint))
+
+        return self.new_client(self.endpoint, self.application_key, self.application_secret, consumer_key)
+
+    def uses_session(self) -> bool:
+        '''
+        Returns whether the module runs through the holyhope.ovh.ovh httpapi plugin, with no endpoint or
+        application of its own differing from the ones of the session.
+        '''
+        if not self.module._socket_path:
+            return False
+
+        if self._uses_session is None:
+            from ansible_collections.holyhope.ovh.plugins.module_utils.persistent import \
+                session_matches
+
+            self._uses_session = session_matches(self.module._socket_path, **{
+                name: self.module.params.get(name) for name in ('endpoint', 'application_key', 'application_secret')
+            })
+
+            if not self._uses_session:
+                self.debug("Module credentials differ from the ones of the httpapi session, using its own client")
+
+        return self._uses_session
+
+    def new_client(self, endpoint: str, application_key: str, application_secret: str,
+                   consumer_key: 'Optional[str]' = None) -> 'Client':
+        '''
+        Returns the pooled client of the credentials, with the client options of the module.
+        '''
+        from ansible_collections.holyhope.ovh.plugins.module_utils.client import \
+            get_client
+
+        return get_client(
+            endpoint=endpoint,
+            application_key=application_key,
+            application_secret=application_secret,
+            consumer_key=consumer_key,
+            pool_size=self.pool_size,
+            cache_dir=self.cache_dir,
+            time_delta_ttl=self.time_delta_ttl,
+            stats=self.stats,
+            rate_limit=self.rate_limit,
+            rate_burst=self.rate_burst,
+            max_retries=self.max_retries,
+            response_cache=self.responses,
         )
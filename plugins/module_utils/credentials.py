@@ -0,0 +1,236 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+    from ansible_collections.holyhope.ovh.plugins.module_utils.client import \
+        Client
+
+from datetime import datetime, timedelta, timezone
+
+from ansible_collections.holyhope.ovh.plugins.module_utils.ips import \
+    diff_ips
+from ansible_collections.holyhope.ovh.plugins.module_utils.parallel import (
+    DEFAULT_CONCURRENCY, imap_bounded, imap_ordered)
+
+CREDENTIALS_PATH = '/me/api/credential'
+
+CREDENTIAL_STATUSES = ['expired', 'pendingValidation', 'refused', 'validated']
+
+
+def parse_date(value: 'Optional[str]') -> 'Optional[datetime]':
+    '''
+    Parses the dates returned by the API.
+
+    >>> parse_date('2021-01-01T00:00:00+01:00')
+    datetime.datetime(2021, 1, 1, 0, 0, tzinfo=datetime.timezone(datetime.timedelta(seconds=3600)))
+    >>> parse_date('2021-01-01T00:00:00Z').tzinfo
+    datetime.timezone.utc
+    >>> parse_date(None) is None
+    True
+    '''
+    if not value:
+        return None
+
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+
+    date = datetime.fromisoformat(value)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+
+    return date
+
+
+def credential_filter(status: 'Optional[List[str]]' = None, application_ids: 'Optional[List[int]]' = None,
+                      expires_within: 'Optional[int]' = None, unused_for: 'Optional[int]' = None,
+                      older_than: 'Optional[int]' = None,
+                      now: 'Optional[datetime]' = None) -> 'Callable[[Dict[str,Any]], bool]':
+    '''
+    Returns a predicate matching the credentials which satisfy every given criterion.
+
+    Durations are in days: expires_within matches the credentials expiring in less than that,
+    unused_for the ones not used for that long (or never used), older_than the ones created before.
+
+    >>> now = datetime(2021, 3, 1, tzinfo=timezone.utc)
+    >>> credential = dict(status='validated', applicationId=1, creation='2021-01-01T00:00:00+00:00',
+    ...                   expiration='2021-03-05T00:00:00+00:00', lastUse=None)
+    >>> credential_filter(now=now)(credential)
+    True
+    >>> credential_filter(status=['validated'], application_ids=[1], now=now)(credential)
+    True
+    >>> credential_filter(status=['expired'], now=now)(credential)
+    False
+    >>> credential_filter(expires_within=7, unused_for=30, older_than=30, now=now)(credential)
+    True
+    >>> credential_filter(expires_within=1, now=now)(credential)
+    False
+    >>> credential_filter(unused_for=30, now=now)(dict(credential, lastUse='2021-02-28T00:00:00+00:00'))
+    False
+    '''
+    now = now or datetime.now(timezone.utc)
+
+    def matches(credential: 'Dict[str,Any]') -> bool:
+        if status and credential.get('status') not in status:
+            return False
+
+        if application_ids and credential.get('applicationId') not in application_ids:
+            return False
+
+        if expires_within is not None:
+            expiration = parse_date(credential.get('expiration'))
+            if expiration is None or expiration > now + timedelta(days=expires_within):
+                return False
+
+        if unused_for is not None:
+            last_use = parse_date(credential.get('lastUse'))
+            if last_use is not None and last_use > now - timedelta(days=unused_for):
+                return False
+
+        if older_than is not None:
+            creation = parse_date(credential.get('creation'))
+            if creation is None or creation > now - timedelta(days=older_than):
+                return False
+
+        return True
+
+    return matches
+
+
+def list_query(status: 'Optional[List[str]]' = None, application_ids: 'Optional[List[int]]' = None) -> 'Dict[str,Any]':
+    '''
+    Returns the filters the API can apply itself when listing credentials: it only accepts a single value of each.
+
+    >>> list_query(['validated'], [1, 2])
+    {'status': 'validated'}
+    >>> list_query(None, [1])
+    {'applicationId': 1}
+    '''
+    query: 'Dict[str,Any]' = {}
+
+    if status and len(status) == 1:
+        query['status'] = status[0]
+
+    if application_ids and len(application_ids) == 1:
+        query['applicationId'] = application_ids[0]
+
+    return query
+
+
+def iter_credentials(client: 'Client', ids: 'Iterable[int]', concurrency: int = DEFAULT_CONCURRENCY,
+                     errors: 'Optional[Dict[int,str]]' = None, ordered: bool = False) -> 'Iterator[Dict[str,Any]]':
+    '''
+    Fetches the details of the credentials concurrently, and yields them as soon as they are received,
+    or in the order of ids when ordered.
+
+    At most concurrency credentials are fetched at the same time, and ids are consumed lazily.
+    Credentials deleted in the meantime are skipped, other failures are reported in errors.
+    '''
+    from ovh.exceptions import ResourceNotFoundError
+
+    def fetch(credential_id: int) -> 'Dict[str,Any]':
+        return get_credential(client, '%s/%d' % (CREDENTIALS_PATH, credential_id))
+
+    imap = imap_ordered if ordered else imap_bounded
+
+    for credential_id, credential, error in imap(fetch, ids, concurrency):
+        if isinstance(error, ResourceNotFoundError):
+            continue
+
+        if error is not None:
+            if errors is None:
+                raise error
+            errors[credential_id] = str(error)
+            continue
+
+        yield credential
+
+
+def get_credential(client: 'Client', path: str) -> 'Dict[str,Any]':
+    '''
+    Fetches a credential, whose rules are replaced by their accesses while they are decoded.
+    '''
+    credential = client.get_folded(path, dict(rules=transform_accesses))
+    credential['accesses'] = credential.pop('rules', None) or {}
+
+    return credential
+
+
+def transform_accesses(rules: 'Optional[Iterable[Dict[str,str]]]') -> 'Dict[str,List[str]]':
+    '''
+    Groups the access rules of a credential by path.
+
+    >>> transform_accesses([dict(method='GET', path='/me'), dict(method='PUT', path='/me')])
+    {'/me': ['GET', 'PUT']}
+    >>> transform_accesses(None)
+    {}
+    '''
+    accesses: 'Dict[str,List[str]]' = {}
+
+    for rule in rules or ():
+        accesses.setdefault(rule['path'], []).append(rule['method'])
+
+    return accesses
+
+
+def summarize(credential: 'Dict[str,Any]') -> 'Dict[str,Any]':
+    '''
+    Keeps the fields of a credential returned by modules, with snake case names.
+
+    The credential is either returned by the API, or by get_credential.
+
+    >>> sorted(summarize(dict(credentialId=1, status='validated', rules=[])).items())[:3]
+    [('accesses', {}), ('allowed_ips', None), ('application_id', None)]
+    >>> summarize(dict(credentialId=1, accesses={'/me': ['GET']}))['accesses']
+    {'/me': ['GET']}
+    '''
+    accesses = credential['accesses'] if 'accesses' in credential else transform_accesses(credential.get('rules'))
+
+    return dict(
+        credential_id=credential.get('credentialId'),
+        application_id=credential.get('applicationId'),
+        status=credential.get('status'),
+        creation=credential.get('creation'),
+        expiration=credential.get('expiration'),
+        last_use=credential.get('lastUse'),
+        allowed_ips=credential.get('allowedIPs'),
+        accesses=accesses,
+    )
+
+
+def plan_credential(current: 'Optional[Dict[str,Any]]', state: str,
+                    ips: 'Optional[List[str]]' = None) -> 'List[Dict[str,Any]]':
+    '''
+    Returns the writes bringing the current credential (None when it does not exist) to the desired state.
+
+    ips must be normalized, None keeps the allowed ips unchanged.
+
+    >>> current = dict(credentialId=1, status='validated', allowedIPs=['10.0.0.0/24'])
+    >>> plan_credential(current, 'present', ['10.0.0.0/24'])
+    []
+    >>> plan_credential(current, 'validated', ['10.0.0.0/24', '127.0.0.1/32'])
+    [{'action': 'update', 'allowed_ips': ['10.0.0.0/24', '127.0.0.1/32'], 'added': ['127.0.0.1/32'], 'removed': []}]
+    >>> plan_credential(current, 'absent')
+    [{'action': 'delete'}]
+    >>> plan_credential(None, 'absent')
+    []
+    '''
+    if state == 'absent':
+        return [] if current is None else [dict(action='delete')]
+
+    if current is None or ips is None:
+        return []
+
+    added, removed = diff_ips(current.get('allowedIPs') or [], ips)
+    if not added and not removed:
+        return []
+
+    return [dict(action='update', allowed_ips=ips, added=added, removed=removed)]
@@ -0,0 +1,66 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterable, List, Tuple
+
+from ipaddress import collapse_addresses, ip_network
+
+
+def normalize_ips(ips: 'Iterable[str]') -> 'List[str]':
+    '''
+    Aggregates addresses and networks into the smallest sorted list of networks covering them.
+
+    Networks with host bits set, which the API may return, stand for the network holding them.
+
+    >>> normalize_ips(['10.0.0.%d' % i for i in range(256)])
+    ['10.0.0.0/24']
+    >>> normalize_ips(['127.0.0.1', '10.0.0.0/25', '10.0.0.128/25', '127.0.0.1/32'])
+    ['10.0.0.0/24', '127.0.0.1/32']
+    >>> normalize_ips(['::1', '2001:db8::/33', '2001:db8:8000::/33', '192.168.0.1'])
+    ['192.168.0.1/32', '::1/128', '2001:db8::/32']
+    >>> normalize_ips([])
+    []
+    >>> normalize_ips(['10.0.0.1/24', '10.0.0.2'])
+    ['10.0.0.0/24']
+    >>> normalize_ips(['10.0.0.256'])
+    Traceback (most recent call last):
+        ...
+    ValueError: '10.0.0.256' does not appear to be an IPv4 or IPv6 network
+    '''
+    networks: 'Dict[int,List[Any]]' = {4: [], 6: []}
+    for ip in ips:
+        network = ip_network(str(ip).strip(), strict=False)
+        networks[network.version].append(network)
+
+    return [str(network) for version in (4, 6) for network in collapse_addresses(networks[version])]
+
+
+def diff_ips(current: 'Iterable[str]', desired: 'Iterable[str]') -> 'Tuple[List[str], List[str]]':
+    '''
+    Returns the networks to add and to remove so that the normalized current ips match the desired ones.
+
+    >>> diff_ips(['10.0.0.0/24'], ['10.0.0.%d' % i for i in range(256)])
+    ([], [])
+    >>> diff_ips(['10.0.0.0/25', '127.0.0.1'], ['10.0.0.0/24', '127.0.0.1'])
+    (['10.0.0.0/24'], ['10.0.0.0/25'])
+    >>> diff_ips([], ['127.0.0.1'])
+    (['127.0.0.1/32'], [])
+    >>> diff_ips(['10.0.0.1/24'], ['10.0.0.0/24'])
+    ([], [])
+    '''
+    current_set = set(normalize_ips(current))
+    desired_list = normalize_ips(desired)
+    desired_set = set(desired_list)
+
+    added = [ip for ip in desired_list if ip not in current_set]
+    removed = [ip for ip in normalize_ips(current_set) if ip not in desired_set]
+
+    return added, removed
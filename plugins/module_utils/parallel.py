@@ -0,0 +1,161 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from itertools import islice
+
+DEFAULT_CONCURRENCY = 10
+
+
+def imap_bounded(func: 'Callable[[Any], Any]', items: 'Iterable[Any]',
+                 concurrency: int = DEFAULT_CONCURRENCY) -> 'Iterator[Tuple[Any, Any, Optional[BaseException]]]':
+    '''
+    Calls func on every item through a thread pool and yields (item, result, error) as soon as they complete.
+
+    At most concurrency calls are in flight, and items are consumed lazily so that
+    generators are never fully loaded in memory.
+
+    >>> sorted(imap_bounded(lambda i: i * 2, range(5), concurrency=2))
+    [(0, 0, None), (1, 2, None), (2, 4, None), (3, 6, None), (4, 8, None)]
+    >>> [(item, type(error).__name__) for item, _, error in imap_bounded(lambda i: 1 // i, [0])]
+    [(0, 'ZeroDivisionError')]
+    '''
+    # Only modules running in bulk need a thread pool: do not load it at startup.
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    concurrency = max(1, concurrency)
+    iterator = iter(items)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {executor.submit(func, item): item for item in islice(iterator, concurrency)}
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                item = pending.pop(future)
+
+                for following in islice(iterator, 1):
+                    pending[executor.submit(func, following)] = following
+
+                error = future.exception()
+                yield item, None if error else future.result(), error
+
+
+def imap_ordered(func: 'Callable[[Any], Any]', items: 'Iterable[Any]',
+                 concurrency: int = DEFAULT_CONCURRENCY) -> 'Iterator[Tuple[Any, Any, Optional[BaseException]]]':
+    '''
+    Like imap_bounded, but yields (item, result, error) in the order of items.
+
+    Results completed before the ones of previous items are held until those complete.
+
+    >>> import time
+    >>> [item for item, _, _ in imap_ordered(lambda i: time.sleep(0.01 * (3 - i)), range(4), concurrency=4)]
+    [0, 1, 2, 3]
+    '''
+    completed: 'Dict[int, Tuple[Any, Any, Optional[BaseException]]]' = {}
+    following = 0
+
+    for (index, item), result, error in imap_bounded(lambda pair: func(pair[1]), enumerate(items), concurrency):
+        completed[index] = (item, result, error)
+
+        while following in completed:
+            yield completed.pop(following)
+            following += 1
+
+
+class DependencyError(Exception):
+    '''
+    Raised instead of calling func on an item whose dependencies failed, or can never be met.
+    '''
+
+
+def imap_dependencies(func: 'Callable[[Any], Any]', dependencies: 'Dict[Any, Iterable[Any]]',
+                      concurrency: int = DEFAULT_CONCURRENCY) -> 'Iterator[Tuple[Any, Any, Optional[BaseException]]]':
+    '''
+    Calls func on every key of dependencies through a thread pool, once func succeeded on all the keys
+    it depends on, and yields (key, result, error) as soon as they complete.
+
+    Independent keys are called concurrently, up to concurrency at a time, in the order of dependencies.
+    Keys depending on a failed key, on an unknown key or on themselves through a cycle are not called:
+    they are yielded with a DependencyError.
+
+    >>> calls = []
+    >>> def call(key):
+    ...     calls.append(key)
+    ...     return key.upper()
+    >>> sorted(imap_dependencies(call, dict(c=['a', 'b'], b=['a'], a=[])))
+    [('a', 'A', None), ('b', 'B', None), ('c', 'C', None)]
+    >>> calls
+    ['a', 'b', 'c']
+    >>> [(key, type(error).__name__) for key, _, error in imap_dependencies(
+    ...     lambda key: 1 // 0 if key == 'a' else key, dict(a=[], b=['a'], c=['b'], d=['d']))]
+    [('d', 'DependencyError'), ('a', 'ZeroDivisionError'), ('b', 'DependencyError'), ('c', 'DependencyError')]
+    '''
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    concurrency = max(1, concurrency)
+    waiting = {key: set(depends_on) for key, depends_on in dependencies.items()}
+    dependents: 'Dict[Any, List[Any]]' = {}
+    for key, depends_on in waiting.items():
+        for dependency in depends_on:
+            dependents.setdefault(dependency, []).append(key)
+
+    def unmet(key: 'Any') -> 'Iterator[Tuple[Any, Any, Optional[BaseException]]]':
+        # Skips key and, transitively, every key depending on it.
+        stack = [key]
+        while stack:
+            for dependent in dependents.get(stack.pop(), ()):
+                if waiting.pop(dependent, None) is not None:
+                    stack.append(dependent)
+                    yield dependent, None, DependencyError('dependency of %s failed' % dependent)
+
+    for key in list(waiting):
+        missing = waiting.get(key, set()) - set(dependencies)
+        if missing or key in waiting.get(key, ()):
+            del waiting[key]
+            yield key, None, DependencyError('unknown or circular dependency of %s' % key)
+            yield from unmet(key)
+
+    ready = [key for key, depends_on in waiting.items() if not depends_on]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending: 'Dict[Any, Any]' = {}
+
+        while ready or pending:
+            while ready and len(pending) < concurrency:
+                key = ready.pop(0)
+                del waiting[key]
+                pending[executor.submit(func, key)] = key
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                key = pending.pop(future)
+                error = future.exception()
+                yield key, None if error else future.result(), error
+
+                if error is not None:
+                    yield from unmet(key)
+                    continue
+
+                for dependent in dependents.get(key, ()):
+                    remaining = waiting.get(dependent)
+                    if remaining is not None:
+                        remaining.discard(key)
+                        if not remaining:
+                            ready.append(dependent)
+
+    # Keys left are part of a cycle.
+    for key in list(waiting):
+        if waiting.pop(key, None) is not None:
+            yield key, None, DependencyError('unknown or circular dependency of %s' % key)
@@ -0,0 +1,85 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import Any, Iterator, Optional
+
+    from ansible_collections.holyhope.ovh.plugins.module_utils.stats import \
+        ApiStats
+    from ansible_collections.holyhope.ovh.plugins.module_utils.streaming import \
+        Folds
+
+import time
+
+from ansible.module_utils.connection import Connection
+from ansible_collections.holyhope.ovh.plugins.module_utils.streaming import \
+    fold
+
+
+def session_matches(socket_path: str, endpoint: 'Optional[str]' = None, application_key: 'Optional[str]' = None,
+                    application_secret: 'Optional[str]' = None) -> bool:
+    '''
+    Returns whether the session of the httpapi plugin uses the given endpoint and application, unset values
+    matching any.
+    '''
+    return Connection(socket_path).ovh_session_matches(endpoint, application_key, application_secret)
+
+
+class PersistentClient(object):
+    '''
+    Client sending the requests of a module through the holyhope.ovh.ovh httpapi plugin.
+
+    It mimics the get, get_folded, iter_get, post, put, delete and call methods of the collection client,
+    so that modules do not know whether they use the persistent session or their own client.
+    Responses are decoded by the connection process, so folds are applied to complete values.
+    '''
+
+    def __init__(self, socket_path: str, consumer_key: 'Optional[str]' = None,
+                 stats: 'Optional[ApiStats]' = None):
+        self.connection = Connection(socket_path)
+        self.consumer_key = consumer_key
+        self.stats = stats
+
+    def get(self, _target: str, _need_auth: bool = True, **kwargs) -> 'Any':
+        return self.request('GET', _target, kwargs, _need_auth)
+
+    def get_folded(self, _target: str, _folds: 'Folds', _need_auth: bool = True, **kwargs) -> 'Any':
+        return fold(self.get(_target, _need_auth, **kwargs), _folds)
+
+    def iter_get(self, _target: str, _need_auth: bool = True, **kwargs) -> 'Iterator[Any]':
+        return iter(self.get(_target, _need_auth, **kwargs))
+
+    def post(self, _target: str, _need_auth: bool = True, **kwargs) -> 'Any':
+        return self.request('POST', _target, kwargs or None, _need_auth)
+
+    def put(self, _target: str, _need_auth: bool = True, **kwargs) -> 'Any':
+        return self.request('PUT', _target, kwargs or None, _need_auth)
+
+    def delete(self, _target: str, _need_auth: bool = True, **kwargs) -> 'Any':
+        return self.request('DELETE', _target, kwargs, _need_auth)
+
+    def call(self, method: str, path: str, data: 'Any' = None, need_auth: bool = True) -> 'Any':
+        return self.request(method, path, data, need_auth)
+
+    def request(self, method: str, path: str, params: 'Any', need_auth: bool) -> 'Any':
+        start = time.perf_counter()
+        response = self.connection.ovh_request(method, path, params, need_auth, self.consumer_key)
+
+        if self.stats is not None:
+            # Latencies include the round trip to the connection process, sizes are unknown.
+            self.stats.record(method, path, response.get('status', 200), time.perf_counter() - start, 0, 0)
+
+        if 'error' in response:
+            # Modules catch the exceptions of python-ovh, like ResourceNotFoundError.
+            from ovh import exceptions
+
+            raise getattr(exceptions, response['error'], exceptions.APIError)(response['msg'])
+
+        return response['result']
@@ -0,0 +1,188 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional
+
+import os
+import re
+import socket
+import sys
+import threading
+import time
+
+from ansible.module_utils.basic import env_fallback
+
+PROFILERS = ['cpu', 'memory']
+DEFAULT_PROFILE_DIR = '~/.ansible/profiles/holyhope.ovh'
+PROFILE_TOP = 10
+
+PROFILE_ARGS = dict(
+    profile=dict(
+        type='list',
+        elements='str',
+        choices=PROFILERS,
+        required=False,
+        default=[],
+        fallback=(env_fallback, ['OVH_PROFILE']),
+    ),
+    profile_dir=dict(
+        type='path',
+        required=False,
+        default=DEFAULT_PROFILE_DIR,
+        fallback=(env_fallback, ['OVH_PROFILE_DIR']),
+    ),
+    profile_name=dict(
+        type='str',
+        required=False,
+    ),
+)
+
+
+def profile_path(directory: str, name: str, extension: str, now: 'Optional[float]' = None) -> str:
+    '''
+    Returns the path of a profile, named after the task, the host and the time of the run.
+
+    >>> profile_path('/tmp', 'web-1/List keys', 'prof', now=0).startswith('/tmp/web-1_List_keys-')
+    True
+    >>> profile_path('/tmp', 'task', 'prof', now=0).endswith('-19700101T000000-%d.prof' % os.getpid())
+    True
+    '''
+    timestamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime(time.time() if now is None else now))
+    filename = '%s-%s-%s-%d.%s' % (name, socket.gethostname(), timestamp, os.getpid(), extension)
+
+    return os.path.join(os.path.expanduser(directory), re.sub(r'[^\w.-]+', '_', filename))
+
+
+class Profiler(object):
+    '''
+    Profiles a module run with cProfile and/or tracemalloc, from start to stop.
+
+    Every thread started in the meantime is profiled too, since modules send their requests
+    from thread pools. Profiles are written in directory, and stop returns the hotspots
+    and the peak memory usage.
+    '''
+
+    def __init__(self, profilers: 'List[str]', directory: str = DEFAULT_PROFILE_DIR, name: str = 'module'):
+        self.profilers = profilers
+        self.directory = directory
+        self.name = name
+
+        self._profiles: 'List[Any]' = []
+        self._lock = threading.Lock()
+        self._summary: 'Optional[Dict[str,Any]]' = None
+
+    @classmethod
+    def from_params(cls, params: 'Dict[str,Any]', module_name: str) -> 'Optional[Profiler]':
+        if not params.get('profile'):
+            return None
+
+        return cls(params['profile'], params['profile_dir'], params.get('profile_name') or module_name)
+
+    def start(self):
+        if 'memory' in self.profilers:
+            import tracemalloc
+
+            tracemalloc.start()
+
+        if 'cpu' in self.profilers:
+            threading.setprofile(self._profile_thread)
+            self._enable()
+
+    def _enable(self):
+        import cProfile
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python >= 3.12 profiles every thread with the profiler of the main one.
+            return
+
+        with self._lock:
+            self._profiles.append(profile)
+
+    def _profile_thread(self, frame: 'Any', event: str, arg: 'Any'):
+        # Called on the first event of a new thread: replace this hook by a profiler of the thread.
+        sys.setprofile(None)
+        self._enable()
+
+    def stop(self) -> 'Dict[str,Any]':
+        '''
+        Stops profiling, writes the profiles and returns their summary. Later calls return the same summary.
+        '''
+        if self._summary is not None:
+            return self._summary
+
+        summary: 'Dict[str,Any]' = {}
+
+        if 'cpu' in self.profilers:
+            threading.setprofile(None)
+            summary['cpu'] = self._stop_cpu()
+
+        if 'memory' in self.profilers:
+            summary['memory'] = self._stop_memory()
+
+        self._summary = summary
+        return summary
+
+    def _stop_cpu(self) -> 'Dict[str,Any]':
+        import pstats
+
+        with self._lock:
+            profiles = list(self._profiles)
+
+        for profile in profiles:
+            profile.disable()
+
+        stats = pstats.Stats(*profiles)
+        path = self._write(lambda path: stats.dump_stats(path), 'prof')
+
+        hotspots = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:PROFILE_TOP]  # type: ignore
+
+        return dict(
+            path=path,
+            seconds=round(stats.total_tt, 6),  # type: ignore
+            hotspots=[
+                dict(function='%s:%d(%s)' % function, calls=calls,
+                     own_seconds=round(own, 6), seconds=round(cumulative, 6))
+                for function, (_, calls, own, cumulative, _) in hotspots
+            ],
+        )
+
+    def _stop_memory(self) -> 'Dict[str,Any]':
+        import tracemalloc
+
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        path = self._write(snapshot.dump, 'tracemalloc')
+
+        return dict(
+            path=path,
+            peak_bytes=peak,
+            hotspots=[
+                dict(location=str(stat.traceback), bytes=stat.size, blocks=stat.count)
+                for stat in snapshot.statistics('lineno')[:PROFILE_TOP]
+            ],
+        )
+
+    def _write(self, dump: 'Any', extension: str) -> 'Optional[str]':
+        path = profile_path(self.directory, self.name, extension)
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            dump(path)
+        except OSError:
+            # The summary is still returned in the result.
+            return None
+
+        return path
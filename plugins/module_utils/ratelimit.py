@@ -0,0 +1,340 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterator, Optional
+
+import json
+import os
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from threading import Condition, Lock, local
+
+DEFAULT_RATE_LIMIT = 0.0
+DEFAULT_RATE_BURST = 10
+DEFAULT_MAX_RETRIES = 5
+
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+
+
+def backoff(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    '''
+    Exponential backoff with full jitter: a random delay up to base * 2 ** attempt, capped.
+
+    >>> 0 <= backoff(1) <= 1.0
+    True
+    >>> 0 <= backoff(20) <= BACKOFF_CAP
+    True
+    '''
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_after(value: 'Optional[str]') -> 'Optional[float]':
+    '''
+    Parses a Retry-After header, given in seconds or as an HTTP date.
+
+    >>> retry_after('2')
+    2.0
+    >>> retry_after('Wed, 21 Oct 2015 07:28:00 GMT')
+    0.0
+    >>> retry_after('soon') is None
+    True
+    >>> retry_after(None) is None
+    True
+    '''
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class SharedState(object):
+    '''
+    JSON state shared by every process using the same file, locked during each update.
+
+    Without path, the state is only shared by the threads of the current process.
+
+    >>> state = SharedState()
+    >>> with state.locked() as values:
+    ...     values['until'] = 1
+    >>> state.read()
+    {'until': 1}
+    '''
+
+    def __init__(self, path: 'Optional[str]' = None):
+        self.path = path
+
+        self._lock = Lock()
+        self._memory: 'Dict[str,Any]' = {}
+
+    def read(self) -> 'Dict[str,Any]':
+        '''
+        Returns a snapshot of the state without locking it.
+        '''
+        if self.path is None:
+            with self._lock:
+                return dict(self._memory)
+
+        try:
+            with open(self.path) as f:
+                return json.loads(f.read() or '{}')
+        except (IOError, OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def locked(self) -> 'Iterator[Dict[str,Any]]':
+        with self._lock:
+            if self.path is None:
+                yield self._memory
+                return
+
+            try:
+                f = self._open_lock()
+            except (IOError, OSError):
+                # Pacing is an optimization: never fail a module run because of it.
+                yield self._memory
+                return
+
+            # Only imported when the state is shared, fcntl is not available everywhere.
+            import fcntl
+
+            with f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+
+                state = self.read()
+
+                yield state
+
+                # Replaced at once, so that read never returns a partial state.
+                temporary = '%s.%d.tmp' % (self.path, os.getpid())
+                try:
+                    with os.fdopen(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as out:
+                        json.dump(state, out)
+                    os.replace(temporary, self.path)
+                except (IOError, OSError):
+                    pass
+
+    def _open_lock(self):
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+
+        fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        return os.fdopen(fd, 'r+')
+
+
+class RateLimiter(object):
+    '''
+    Token bucket pacing the requests of every process sharing the same state file.
+
+    Ansible forks run modules in separate processes: the bucket, and the cooldown requested
+    by the API through Retry-After, are kept in a SharedState.
+    Without rate, requests only honor the cooldown, read without taking the lock.
+
+    >>> limiter = RateLimiter(rate=10, burst=2)
+    >>> limiter.reserve(), limiter.reserve(), 0 < limiter.reserve() <= 0.1
+    (0.0, 0.0, True)
+    >>> limiter.cooldown(5)
+    >>> 4 < limiter.reserve() <= 5
+    True
+    >>> RateLimiter().reserve()
+    0.0
+    '''
+
+    def __init__(self, path: 'Optional[str]' = None, rate: float = DEFAULT_RATE_LIMIT,
+                 burst: int = DEFAULT_RATE_BURST):
+        self.path = path
+        self.rate = rate
+        self.burst = max(1, burst)
+
+        self.state = SharedState(path)
+
+    def acquire(self):
+        '''
+        Waits until a request may be sent.
+        '''
+        while True:
+            wait = self.reserve()
+            if wait <= 0:
+                return
+
+            # Spread the processes waking up at the end of the same cooldown.
+            time.sleep(wait + random.uniform(0, min(wait, 1.0) / 10))
+
+    def reserve(self) -> float:
+        '''
+        Takes a token and returns 0, or returns the seconds to wait before trying again.
+        '''
+        if self.rate <= 0:
+            return max(0.0, self.state.read().get('until', 0) - time.time())
+
+        with self.state.locked() as state:
+            now = time.time()
+
+            until = state.get('until', 0)
+            if until > now:
+                return until - now
+
+            tokens = min(self.burst, state.get('tokens', self.burst) + (now - state.get('updated', now)) * self.rate)
+            state['updated'] = now
+
+            if tokens >= 1:
+                state['tokens'] = tokens - 1
+                return 0.0
+
+            state['tokens'] = tokens
+            return (1 - tokens) / self.rate
+
+    def cooldown(self, seconds: float):
+        '''
+        Holds every request back for the given seconds.
+        '''
+        with self.state.locked() as state:
+            state['until'] = max(state.get('until', 0), time.time() + seconds)
+
+
+class AdaptiveConcurrency(object):
+    '''
+    Limits the requests in flight, like TCP congestion control: the limit is halved
+    when the API throttles a request, and grows back by one every limit successes.
+
+    With a SharedState, the limit is also applied to the requests in flight of every process sharing it,
+    from the first throttled request until it grows back to maximum. Each of these requests holds a
+    slot in the state, freed after SLOT_LEASE seconds if its process dies. Until the API throttles,
+    requests only read the state.
+
+    >>> concurrency = AdaptiveConcurrency(8)
+    >>> concurrency.throttled()
+    >>> concurrency.limit
+    4.0
+    >>> for _ in range(4):
+    ...     concurrency.succeeded()
+    >>> round(concurrency.limit)
+    5
+    >>> with concurrency:
+    ...     concurrency.in_flight
+    1
+
+    >>> shared = SharedState()
+    >>> first, second = AdaptiveConcurrency(2, shared), AdaptiveConcurrency(2, shared)
+    >>> first.throttled()
+    >>> with second:
+    ...     len(shared.read()['slots'])
+    1
+    >>> second.succeeded(), second.succeeded()
+    (None, None)
+    >>> 'limit' in shared.read()
+    False
+    '''
+
+    SLOT_LEASE = 60.0
+    SLOT_POLL = 0.05
+
+    def __init__(self, maximum: int, state: 'Optional[SharedState]' = None):
+        self.maximum = max(1, maximum)
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self.state = state
+
+        self._condition = Condition()
+        self._local = local()
+
+    def __enter__(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+
+            self.in_flight += 1
+
+        try:
+            self._local.slot = self._take_slot()
+        except BaseException:
+            self._release()
+            raise
+
+        return self
+
+    def __exit__(self, *args):
+        slot = getattr(self._local, 'slot', None)
+        self._local.slot = None
+
+        if slot is not None:
+            with self.state.locked() as state:  # type: ignore[union-attr]
+                state.get('slots', {}).pop(slot, None)
+
+        self._release()
+
+    def succeeded(self):
+        with self._condition:
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._condition.notify()
+
+        if self.state is None or 'limit' not in self.state.read():
+            return
+
+        with self.state.locked() as state:
+            if 'limit' not in state:
+                return
+
+            state['limit'] += 1 / state['limit']
+            if state['limit'] >= self.maximum:
+                # Back to normal: stop coordinating the processes.
+                del state['limit']
+                state.pop('slots', None)
+
+    def throttled(self):
+        with self._condition:
+            self.limit = max(1.0, self.limit / 2)
+
+        if self.state is None:
+            return
+
+        with self.state.locked() as state:
+            state['limit'] = max(1.0, min(float(self.maximum), state.get('limit', self.maximum)) / 2)
+
+    def _release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def _take_slot(self) -> 'Optional[str]':
+        '''
+        Waits for a slot of the shared limit, and returns its id, or None while the API does not throttle.
+        '''
+        if self.state is None:
+            return None
+
+        while 'limit' in self.state.read():
+            with self.state.locked() as state:
+                if 'limit' not in state:
+                    break
+
+                now = time.time()
+                slots = {slot: expiry for slot, expiry in state.get('slots', {}).items() if expiry > now}
+                state['slots'] = slots
+
+                if len(slots) < int(state['limit']):
+                    slot = uuid.uuid4().hex
+                    slots[slot] = now + self.SLOT_LEASE
+                    return slot
+
+            time.sleep(random.uniform(self.SLOT_POLL, 2 * self.SLOT_POLL))
+
+        return None
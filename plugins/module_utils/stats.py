@@ -0,0 +1,189 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List
+
+import bisect
+import math
+import re
+from threading import Lock
+
+ID_SEGMENT = re.compile(r'/(\d+)(?=/|$)')
+
+# Upper bounds, in seconds, of the latency histogram buckets: about 1.5x apart from 1ms to 70s.
+LATENCY_BUCKETS = [round(factor * 10 ** exponent / 1000.0, 6) for exponent in range(5) for factor in (1, 1.5, 2, 3, 5, 7)]
+
+
+def path_template(path: str) -> str:
+    '''
+    Returns the path without its query string and with numeric ids replaced, to group similar calls.
+
+    >>> path_template('/me/api/credential/1234')
+    '/me/api/credential/{id}'
+    >>> path_template('/me/api/credential/1234/application?foo=bar')
+    '/me/api/credential/{id}/application'
+    >>> path_template('/auth/time')
+    '/auth/time'
+    '''
+    return ID_SEGMENT.sub('/{id}', path.split('?', 1)[0])
+
+
+def percentile(values: 'List[float]', rank: float) -> float:
+    '''
+    Nearest-rank percentile.
+
+    >>> percentile([0.3, 0.1, 0.2, 0.4], 50)
+    0.2
+    >>> percentile([0.3, 0.1, 0.2, 0.4], 95)
+    0.4
+    >>> percentile([], 50)
+    0.0
+    '''
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    return ordered[max(0, int(math.ceil(rank / 100.0 * len(ordered))) - 1)]
+
+
+def histogram(latencies: 'List[float]') -> 'Dict[str,int]':
+    '''
+    Counts latencies in LATENCY_BUCKETS, keyed by the upper bound of each non-empty bucket.
+
+    Unlike percentiles, histograms of several module runs can be added up.
+
+    >>> histogram([0.0004, 0.12, 0.15, 80])
+    {'0.001': 1, '0.15': 2, '+Inf': 1}
+    '''
+    counts = [0] * (len(LATENCY_BUCKETS) + 1)
+    for latency in latencies:
+        counts[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    bounds = ['%g' % bound for bound in LATENCY_BUCKETS] + ['+Inf']
+    return {bound: count for bound, count in zip(bounds, counts) if count}
+
+
+def histogram_percentile(counts: 'Dict[str,int]', rank: float, maximum: float) -> float:
+    '''
+    Nearest-rank percentile of a histogram: the upper bound of the bucket holding it, at most maximum.
+
+    >>> histogram_percentile({'0.001': 1, '0.15': 2, '+Inf': 1}, 50, 80)
+    0.15
+    >>> histogram_percentile({'0.001': 1, '0.15': 2, '+Inf': 1}, 95, 80)
+    80
+    >>> histogram_percentile({}, 50, 0)
+    0.0
+    '''
+    total = sum(counts.values())
+    if not total:
+        return 0.0
+
+    target = max(1, int(math.ceil(rank / 100.0 * total)))
+    seen = 0
+    for bound, count in sorted(counts.items(), key=lambda item: float(item[0])):
+        seen += count
+        if seen >= target:
+            return min(float(bound), maximum)
+
+    return maximum
+
+
+def merge(aggregate: 'Dict[str,Any]', other: 'Dict[str,Any]') -> 'Dict[str,Any]':
+    '''
+    Adds up two aggregates of ApiStats.summary, with percentiles estimated from their histograms.
+
+    >>> stats = ApiStats()
+    >>> stats.record('GET', '/me', 200, 0.1, 0, 10)
+    >>> total = merge(merge(EMPTY_AGGREGATE, stats.summary()['total']), stats.summary()['total'])
+    >>> total['calls'], total['bytes'], total['p95'], total['histogram']
+    (2, 20, 0.1, {'0.1': 2})
+    '''
+    counts = dict(aggregate.get('histogram', {}))
+    for bound, count in other.get('histogram', {}).items():
+        counts[bound] = counts.get(bound, 0) + count
+
+    maximum = max(aggregate.get('max', 0.0), other.get('max', 0.0))
+
+    return dict(
+        {key: aggregate.get(key, 0) + other.get(key, 0) for key in ('calls', 'errors', 'throttled', 'retries', 'bytes')},
+        seconds=round(aggregate.get('seconds', 0.0) + other.get('seconds', 0.0), 6),
+        p50=round(histogram_percentile(counts, 50, maximum), 6),
+        p95=round(histogram_percentile(counts, 95, maximum), 6),
+        max=maximum,
+        histogram=counts,
+    )
+
+
+class ApiStats(object):
+    '''
+    Records every HTTP request sent to the API during a module run.
+
+    >>> stats = ApiStats()
+    >>> stats.record('GET', '/me/api/credential/1', 200, 0.1, 0, 512)
+    >>> stats.record('GET', '/me/api/credential/2', 404, 0.3, 0, 64)
+    >>> stats.record('PUT', '/me/api/credential/1', 200, 0.2, 1, 4)
+    >>> summary = stats.summary()
+    >>> summary['total']['calls'], summary['total']['errors'], summary['total']['retries'], summary['total']['bytes']
+    (3, 1, 1, 580)
+    >>> summary['paths']['GET /me/api/credential/{id}']['p95']
+    0.3
+    '''
+
+    def __init__(self):
+        self.calls: 'List[Dict[str,Any]]' = []
+        self._lock = Lock()
+
+    def record(self, method: str, path: str, status: int, latency: float, retries: int, size: int):
+        '''
+        Records a request, retries being 1 when it was sent again after a failed attempt and 0 otherwise.
+        '''
+        with self._lock:
+            self.calls.append(dict(
+                method=method.upper(),
+                path=path_template(path),
+                status=status,
+                latency=latency,
+                retries=retries,
+                size=size,
+            ))
+
+    def summary(self) -> 'Dict[str,Any]':
+        with self._lock:
+            calls = list(self.calls)
+
+        paths: 'Dict[str,List[Dict[str,Any]]]' = {}
+        for call in calls:
+            paths.setdefault('%s %s' % (call['method'], call['path']), []).append(call)
+
+        return dict(
+            total=self._aggregate(calls),
+            paths={key: self._aggregate(path_calls) for key, path_calls in sorted(paths.items())},
+        )
+
+    @staticmethod
+    def _aggregate(calls: 'List[Dict[str,Any]]') -> 'Dict[str,Any]':
+        latencies = [call['latency'] for call in calls]
+
+        return dict(
+            calls=len(calls),
+            errors=sum(1 for call in calls if not 200 <= call['status'] < 300),
+            throttled=sum(1 for call in calls if call['status'] == 429),
+            retries=sum(call['retries'] for call in calls),
+            bytes=sum(call['size'] for call in calls),
+            seconds=round(sum(latencies), 6),
+            p50=round(percentile(latencies, 50), 6),
+            p95=round(percentile(latencies, 95), 6),
+            max=round(max(latencies, default=0.0), 6),
+            histogram=histogram(latencies),
+        )
+
+
+EMPTY_AGGREGATE = ApiStats._aggregate([])
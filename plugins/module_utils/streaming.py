@@ -0,0 +1,143 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import IO, Any, Callable, Dict, Iterator, Tuple
+
+    Folds = Dict[str, Callable[[Iterator[Any]], Any]]
+
+import json
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+
+def fold(value: 'Any', folds: 'Folds') -> 'Any':
+    '''
+    Replaces the arrays, or nulls, at the top-level keys of a decoded object by the result of their fold.
+
+    >>> fold(dict(id=1, rules=[1, 2, 3]), dict(rules=sum))
+    {'id': 1, 'rules': 6}
+    >>> fold(dict(id=1, rules=None), dict(rules=list))
+    {'id': 1, 'rules': []}
+    >>> fold(dict(id=1, rules=dict(a=1)), dict(rules=list))
+    {'id': 1, 'rules': {'a': 1}}
+    '''
+    if not isinstance(value, dict):
+        return value
+
+    for key, function in folds.items():
+        if key in value and (value[key] is None or isinstance(value[key], list)):
+            value[key] = function(iter(value[key] or ()))
+
+    return value
+
+
+def iter_items(stream: 'IO[bytes]') -> 'Iterator[Any]':
+    '''
+    Yields the elements of the JSON array read from stream, decoding them while the array is read
+    when ijson is installed.
+
+    >>> from io import BytesIO
+    >>> list(iter_items(BytesIO(b'[1, 2.5, {"a": [true]}]')))
+    [1, 2.5, {'a': [True]}]
+    >>> try:
+    ...     list(iter_items(BytesIO(b'[1,')))
+    ... except ValueError:
+    ...     print('invalid')
+    invalid
+    '''
+    if not HAS_IJSON:
+        yield from json.load(stream)
+        return
+
+    try:
+        yield from ijson.items(stream, 'item', use_float=True)
+    except ijson.JSONError as e:
+        raise ValueError('incomplete or invalid JSON document') from e
+
+
+def decode_folded(stream: 'IO[bytes]', folds: 'Folds') -> 'Any':
+    '''
+    Decodes the JSON document read from stream, like fold(json.load(stream), folds).
+
+    With ijson, the elements of the folded arrays are decoded one at a time while they are read,
+    so that a large array is never held in memory.
+
+    >>> from io import BytesIO
+    >>> decode_folded(BytesIO(b'{"id": 1, "rules": [{"n": 1}, {"n": 2}], "ips": null}'),
+    ...               dict(rules=lambda rules: [rule['n'] for rule in rules]))
+    {'id': 1, 'rules': [1, 2], 'ips': None}
+    >>> decode_folded(BytesIO(b'{"rules": [1, 2, 3], "next": {"a": [4]}}'), dict(rules=lambda rules: next(rules)))
+    {'rules': 1, 'next': {'a': [4]}}
+    >>> decode_folded(BytesIO(b'[1, 2]'), dict(rules=sum))
+    [1, 2]
+    >>> decode_folded(BytesIO(b'{"rules": {"a": [1]}, "id": 2}'), dict(rules=lambda rules: rules))
+    {'rules': {'a': [1]}, 'id': 2}
+    '''
+    if not HAS_IJSON:
+        return fold(json.load(stream), folds)
+
+    try:
+        events = iter(ijson.basic_parse(stream, use_float=True))
+
+        event, value = next(events)
+        if event != 'start_map':
+            return _build(events, event, value)
+
+        result: 'Dict[str,Any]' = {}
+        for event, key in events:
+            if event == 'end_map':
+                return result
+
+            event, value = next(events)
+
+            if key in folds and event == 'start_array':
+                items = _iter_array(events)
+                result[key] = folds[key](items)
+                # The fold may stop early: skip the rest of the array.
+                for _ in items:
+                    pass
+            elif key in folds and event == 'null':
+                result[key] = folds[key](iter(()))
+            else:
+                result[key] = _build(events, event, value)
+    except (ijson.JSONError, StopIteration) as e:
+        raise ValueError('incomplete or invalid JSON document') from e
+
+    raise ValueError('incomplete or invalid JSON document')
+
+
+def _iter_array(events: 'Iterator[Tuple[str,Any]]') -> 'Iterator[Any]':
+    for event, value in events:
+        if event == 'end_array':
+            return
+
+        yield _build(events, event, value)
+
+
+def _build(events: 'Iterator[Tuple[str,Any]]', event: str, value: 'Any') -> 'Any':
+    # Plain recursion is several times faster than ijson.ObjectBuilder.
+    if event == 'start_map':
+        obj: 'Dict[str,Any]' = {}
+        for event, key in events:
+            if event == 'end_map':
+                return obj
+
+            event, value = next(events)
+            obj[key] = _build(events, event, value)
+
+    if event == 'start_array':
+        return list(_iter_array(events))
+
+    return value
@@ -3,20 +3,16 @@ try:
     from typing import TYPE_CHECKING
 
     if TYPE_CHECKING:
-        from typing import Any
+        from typing import Any, Dict, List, Set, Tuple, Union
 except ImportError:
     TYPE_CHECKING = False
 
 
 from ansible.module_utils.common.validation import (check_type_dict,
+                                                    check_type_int,
                                                     check_type_list,
                                                     check_type_str)
 
-try:
-    from ovh import consumer_key as ovh
-except ImportError:
-    ovh = object
-
 from urllib.parse import quote as urlquote
 
 try:
@@ -25,6 +21,9 @@ except ImportError:
     def warn(*args, **kwargs):  # type: ignore
         None
 
+# Same as ovh.API_READ_WRITE, without importing python-ovh at module startup.
+API_READ_WRITE = ['GET', 'POST', 'PUT', 'DELETE']
+
 
 def check_type_access_method(method: 'Any') -> str:
     '''
@@ -46,8 +45,8 @@ def check_type_access_method(method: 'Any') -> str:
     ValueError: 0.3 must be one of (GET,POST,PUT,DELETE)
     '''
     method = check_type_str(method).upper()
-    if method not in ovh.API_READ_WRITE:
-        raise ValueError('%s must be one of (%s)' % (method, ','.join(ovh.API_READ_WRITE)))
+    if method not in API_READ_WRITE:
+        raise ValueError('%s must be one of (%s)' % (method, ','.join(API_READ_WRITE)))
 
     return method
 
@@ -117,3 +116,117 @@ def check_type_accesses(accesses: 'Any') -> dict:
             result[endpoint].append(method)
 
     return result
+
+
+class AccessTrie(object):
+    '''
+    Trie of path segments marking the prefixes covered by a wildcard rule (``/prefix/*``).
+
+    >>> trie = AccessTrie()
+    >>> trie.insert('/me/*')
+    >>> trie.covers('/me/api/credential')
+    True
+    >>> trie.covers('/me/*/application')
+    True
+    >>> trie.covers('/me/*')
+    False
+    >>> trie.covers('/me')
+    False
+    >>> trie.covers('/domain')
+    False
+    '''
+    WILDCARD = '*'
+
+    def __init__(self):
+        self.children: 'Dict[str,AccessTrie]' = {}
+        self.wildcard = False
+
+    def insert(self, path: str):
+        segments = path.split('/')
+        if segments[-1] != self.WILDCARD:
+            return
+
+        node = self
+        for segment in segments[:-1]:
+            node = node.children.setdefault(segment, AccessTrie())
+
+        node.wildcard = True
+
+    def covers(self, path: str) -> bool:
+        segments = path.split('/')
+
+        node = self
+        for depth, segment in enumerate(segments):
+            remaining = segments[depth:]
+            if node.wildcard and remaining != [self.WILDCARD]:
+                return True
+
+            node = node.children.get(segment)  # type: ignore
+            if node is None:
+                return False
+
+        return False
+
+
+def compile_accesses(accesses: 'Dict[str,List[str]]') -> 'Tuple[List[Dict[str,str]], int]':
+    '''
+    Compiles accesses into the minimal sorted list of rules, and the number of rules eliminated.
+
+    Duplicated rules and rules already granted by a wildcard rule of the same method are removed.
+
+    >>> compile_accesses({'/me/api': ['GET', 'GET'], '/me/*': ['GET'], '/me': ['PUT', 'GET']})
+    ([{'path': '/me', 'method': 'GET'}, {'path': '/me', 'method': 'PUT'}, {'path': '/me/*', 'method': 'GET'}], 2)
+    >>> compile_accesses({'/*': ['GET'], '/me': ['GET', 'DELETE'], '/me/*': ['GET']})
+    ([{'path': '/*', 'method': 'GET'}, {'path': '/me', 'method': 'DELETE'}], 2)
+    >>> compile_accesses({})
+    ([], 0)
+    '''
+    tries: 'Dict[str,AccessTrie]' = {}
+    total = 0
+    unique = set()
+
+    for path, methods in accesses.items():
+        for method in methods:
+            total += 1
+            unique.add((path, method))
+            tries.setdefault(method, AccessTrie()).insert(path)
+
+    order = {method: index for index, method in enumerate(API_READ_WRITE)}
+    rules = [
+        {'path': path, 'method': method}
+        for path, method in sorted(unique, key=lambda rule: (rule[0], order.get(rule[1], len(order)), rule[1]))
+        if not tries[method].covers(path)
+    ]
+
+    return rules, total - len(rules)
+
+
+ALL_CREDENTIALS = 'all'
+
+
+def check_type_credential_ids(ids: 'Any') -> 'Union[str, List[int]]':
+    '''
+    >>> check_type_credential_ids('all')
+    'all'
+    >>> check_type_credential_ids([1, '2', 1])
+    [1, 2]
+    >>> check_type_credential_ids('1,2')
+    [1, 2]
+    >>> check_type_credential_ids(['me'])  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+        ...
+    TypeError: ...cannot be converted to an int
+    '''
+    if ids == ALL_CREDENTIALS:
+        return ALL_CREDENTIALS
+
+    result = []  # type: List[int]
+    seen: 'Set[int]' = set()
+    for credential_id in check_type_list(ids):
+        credential_id = check_type_int(credential_id)
+
+        if credential_id not in seen:
+            seen.add(credential_id)
+            result.append(credential_id)
+
+    return result
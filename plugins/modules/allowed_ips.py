@@ -6,20 +6,16 @@ try:
     from typing import TYPE_CHECKING
 
     if TYPE_CHECKING:
-        from typing import Any, Dict
+        from typing import Any, Dict, List, Tuple
 
 except ImportError:
     TYPE_CHECKING = False
 
 
-try:
-    import ovh
-except ImportError:
-    ovh = None
-
-
 from ansible_collections.holyhope.ovh.plugins.module_utils.authenticated import \
     AuthenticatedOVHModuleBase
+from ansible_collections.holyhope.ovh.plugins.module_utils.ips import (
+    diff_ips, normalize_ips)
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
                     'status': ['preview'],
@@ -35,7 +31,10 @@ description:
 options:
     ips:
         description:
-            - The ips to authorize.
+            - The ips and networks to authorize.
+            - They are aggregated before being compared to the current ones, so C(10.0.0.0/24) and
+              the 256 addresses it contains are the same.
+            - A network with host bits set, like C(10.0.0.1/24), stands for the network holding it.
         required: true
     subject_credential_id:
         description:
@@ -44,6 +43,7 @@ options:
         required: false
 extends_documentation_fragment:
     - holyhope.ovh.ovh_api
+    - holyhope.ovh.ovh_api.profile
 author:
     - Pierre PÉRONNET <pierre.peronnet@ovhcloud.com>
 '''
@@ -57,6 +57,24 @@ EXAMPLES = '''
 '''
 
 RETURN = '''
+ips:
+    description:
+        - The aggregated networks allowed to use the credential.
+    returned: always
+    type: list
+    sample: ["10.0.0.0/24", "127.0.0.1/32"]
+added:
+    description:
+        - The networks which were not allowed yet.
+    returned: always
+    type: list
+    sample: ["10.0.0.0/24"]
+removed:
+    description:
+        - The networks which are not allowed anymore.
+    returned: always
+    type: list
+    sample: ["10.0.0.0/25"]
 '''
 
 
@@ -67,6 +85,7 @@ class IPsModule(AuthenticatedOVHModuleBase):
         self.module_arg_spec = dict(
             ips=dict(
                 type='list',
+                elements='str',
                 required=True,
             ),
             subject_credential_id=dict(
@@ -75,48 +94,49 @@ class IPsModule(AuthenticatedOVHModuleBase):
             ),
         )
 
-        self.subject_credential_id = 0
-        self.ips = []
-
         super().__init__(self.module_arg_spec, supports_check_mode=True)
 
     def exec_module(self, **kwargs):
         """Main module execution method"""
+        try:
+            ips = normalize_ips(self.ips)
+        except ValueError as e:
+            self.fail("invalid ips: %s" % e)
+
         creds = self.subject_credential()
 
-        if not self.check(creds):
-            self.update(creds)
+        try:
+            added, removed = self.check(creds, ips)
+        except ValueError as e:
+            self.fail("invalid allowed ips of credential %s: %s" % (creds.get('credentialId'), e))
+        self.results.update(ips=ips, added=added, removed=removed)
+
+        if added or removed:
+            if not self.check_mode:
+                self.update(creds, ips)
             self.set_changed(True)
 
     def subject_credential(self):
         self.debug("Getting consumer key information")
 
         if self.subject_credential_id is not None:
-            return self.client.get('/me/api/credential/%d', self.subject_credential_id)
+            return self.client.get('/me/api/credential/%d' % self.subject_credential_id)
 
         return self.client.get('/auth/currentCredential')
 
-    def check(self, credentials: 'Dict[str,Any]') -> bool:
-        for ip in credentials['allowedIPs']:
-            if ip not in self.ips:
-                return False
-
-        for ip in self.ips:
-            if ip not in credentials['allowedIPs']:
-                return False
-
-        return True
+    def check(self, credentials: 'Dict[str,Any]', ips: 'List[str]') -> 'Tuple[List[str], List[str]]':
+        '''
+        Computes the networks to add and to remove from the credential.
+        '''
+        return diff_ips(credentials.get('allowedIPs') or [], ips)
 
-    def update(self):
+    def update(self, credentials: 'Dict[str,Any]', ips: 'List[str]'):
         '''
-        Gets the properties of the specified cluster.
-        :return: cluster state dictionary
+        Updates the allowed ips of the credential, reusing the client of the lookup.
         '''
         self.debug("Updating consumer key allowed ips")
 
-        self.client.put('/me/api/credential/%d' % self.subject_credentials_id, body=dict(
-            allowedIPs=self.ips,
-        ))
+        self.client.put('/me/api/credential/%d' % credentials['credentialId'], allowedIPs=ips)
 
 
 def main():
@@ -0,0 +1,326 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+
+    if TYPE_CHECKING:
+        from typing import Any, Dict, List
+except ImportError:
+    TYPE_CHECKING = False
+
+
+from ansible_collections.holyhope.ovh.plugins.module_utils.authenticated import \
+    AuthenticatedOVHModuleBase
+from ansible_collections.holyhope.ovh.plugins.module_utils.parallel import (
+    DEFAULT_CONCURRENCY, DependencyError, imap_dependencies)
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'holyhope'}
+
+DOCUMENTATION = '''
+---
+module: api
+version_added: "0.0.1"
+short_description: Send raw calls to the OVHcloud API
+description:
+    - Send a list of signed calls to any route of the API in a single task, through one pooled client.
+    - Independent calls are sent concurrently, a call with I(depends_on) only once the calls it depends on succeeded.
+    - A write can be skipped when the API is already in the expected state, see I(calls[].check).
+    - In check mode, only C(GET) calls and checks are sent.
+options:
+    calls:
+        description:
+            - The calls to send.
+        type: list
+        elements: dict
+        required: true
+        suboptions:
+            name:
+                description:
+                    - Name of the call, for I(depends_on) and in the results.
+                type: str
+                required: false
+            method:
+                description:
+                    - HTTP method of the call.
+                type: str
+                choices: [GET, POST, PUT, DELETE]
+                default: GET
+            path:
+                description:
+                    - Path of the route, e.g. C(/me/api/credential).
+                type: str
+                required: true
+            body:
+                description:
+                    - Body of a C(POST) or C(PUT), or query string parameters of a C(GET).
+                type: raw
+                required: false
+            depends_on:
+                description:
+                    - Names of the calls which must succeed before this one is sent.
+                    - The call is not sent, and fails, when one of them fails.
+                type: list
+                elements: str
+                default: []
+            check:
+                description:
+                    - A C(GET) sent before the call, which is skipped and changes nothing when the C(GET) matches.
+                type: dict
+                required: false
+                suboptions:
+                    path:
+                        description:
+                            - Path of the C(GET), the path of the call by default.
+                        type: str
+                        required: false
+                    state:
+                        description:
+                            - C(present) matches when the C(GET) succeeds and returns I(match).
+                            - C(absent) matches when the C(GET) returns a 404, e.g. for a C(DELETE).
+                        type: str
+                        choices: [present, absent]
+                        default: present
+                    match:
+                        description:
+                            - Value the C(GET) must return, only the keys of objects given are compared.
+                            - The body of the call by default.
+                        type: raw
+                        required: false
+    concurrency:
+        description:
+            - Maximum number of calls sent at the same time.
+        type: int
+        default: 10
+        required: false
+extends_documentation_fragment:
+    - holyhope.ovh.ovh_api
+    - holyhope.ovh.ovh_api.profile
+author:
+    - Pierre PÉRONNET <pierre.peronnet@ovhcloud.com>
+'''
+
+EXAMPLES = '''
+    - name: Read a few routes at once
+      holyhope.ovh.api:
+        application_key: abcde
+        application_secret: abcde
+        consumer_key: abcde
+        calls:
+        - path: /me
+        - path: /me/api/credential
+          body:
+            status: validated
+      register: ovh
+
+    - name: Add a DNS record and refresh the zone
+      holyhope.ovh.api:
+        application_key: abcde
+        application_secret: abcde
+        consumer_key: abcde
+        calls:
+        - name: record
+          method: POST
+          path: /domain/zone/example.com/record
+          body:
+            fieldType: A
+            subDomain: www
+            target: 192.0.2.1
+        - name: refresh
+          method: POST
+          path: /domain/zone/example.com/refresh
+          depends_on: [record]
+
+    - name: Delete a credential unless it is already deleted
+      holyhope.ovh.api:
+        application_key: abcde
+        application_secret: abcde
+        consumer_key: abcde
+        calls:
+        - method: DELETE
+          path: /me/api/credential/1234
+          check:
+            state: absent
+'''
+
+RETURN = '''
+calls:
+    description:
+        - The outcome of each call, in the order of I(calls).
+        - C(skipped) is true when the check matched, or when the call was not sent in check mode.
+    returned: always
+    type: list
+    elements: dict
+    sample: [{"name": "record", "method": "POST", "path": "/domain/zone/example.com/record",
+              "changed": true, "skipped": false, "failed": false, "result": {"id": 42}}]
+'''
+
+
+def contains(value: 'Any', expected: 'Any') -> bool:
+    '''
+    Tells if value matches expected, only comparing the keys of the objects of expected.
+
+    >>> contains(dict(a=1, b=dict(c=2, d=3)), dict(b=dict(c=2)))
+    True
+    >>> contains(dict(a=1), dict(a=2)), contains(dict(a=1), dict(b=None))
+    (False, False)
+    >>> contains([dict(a=1, b=2)], [dict(a=1)]), contains([1, 2], [1])
+    (True, False)
+    '''
+    if isinstance(expected, dict):
+        return isinstance(value, dict) and all(
+            key in value and contains(value[key], item) for key, item in expected.items())
+
+    if isinstance(expected, list):
+        return isinstance(value, list) and len(value) == len(expected) and all(
+            contains(item, expected_item) for item, expected_item in zip(value, expected))
+
+    return value == expected
+
+
+class ApiModule(AuthenticatedOVHModuleBase):
+    """Configuration class to send raw API calls"""
+
+    def __init__(self):
+        self.module_arg_spec = dict(
+            calls=dict(
+                type='list',
+                elements='dict',
+                required=True,
+                options=dict(
+                    name=dict(
+                        type='str',
+                        required=False,
+                    ),
+                    method=dict(
+                        type='str',
+                        choices=['GET', 'POST', 'PUT', 'DELETE'],
+                        default='GET',
+                    ),
+                    path=dict(
+                        type='str',
+                        required=True,
+                    ),
+                    body=dict(
+                        type='raw',
+                        required=False,
+                    ),
+                    depends_on=dict(
+                        type='list',
+                        elements='str',
+                        default=[],
+                    ),
+                    check=dict(
+                        type='dict',
+                        required=False,
+                        options=dict(
+                            path=dict(
+                                type='str',
+                                required=False,
+                            ),
+                            state=dict(
+                                type='str',
+                                choices=['present', 'absent'],
+                                default='present',
+                            ),
+                            match=dict(
+                                type='raw',
+                                required=False,
+                            ),
+                        ),
+                    ),
+                ),
+            ),
+            concurrency=dict(
+                type='int',
+                required=False,
+                default=DEFAULT_CONCURRENCY,
+            ),
+        )
+
+        super().__init__(self.module_arg_spec, supports_check_mode=True)
+
+    def exec_module(self, **kwargs):
+        """Main module execution method"""
+        indexes: 'Dict[str,int]' = {}
+        for index, call in enumerate(self.calls):
+            if call['name'] is None:
+                continue
+
+            if call['name'] in indexes:
+                self.fail("calls %d and %d are both named %s" % (indexes[call['name']], index, call['name']))
+            indexes[call['name']] = index
+
+        unknown = sorted({name for call in self.calls for name in call['depends_on'] if name not in indexes})
+        if unknown:
+            self.fail("unknown calls in depends_on: %s" % ', '.join(unknown))
+
+        dependencies = {
+            index: [indexes[name] for name in call['depends_on']]
+            for index, call in enumerate(self.calls)
+        }
+
+        outcomes: 'List[Dict[str,Any]]' = [{} for _ in self.calls]
+
+        for index, outcome, error in imap_dependencies(self.send, dependencies, self.concurrency):
+            call = self.calls[index]
+
+            if error is not None:
+                outcome = dict(changed=False, skipped=isinstance(error, DependencyError), failed=True, msg=str(error))
+
+            outcomes[index] = dict(name=call['name'], method=call['method'], path=call['path'], **outcome)
+
+        self.results = dict(
+            changed=any(outcome['changed'] for outcome in outcomes),
+            calls=outcomes,
+        )
+
+        failed = [outcome for outcome in outcomes if outcome['failed']]
+        if failed:
+            self.fail("%d of %d call(s) failed" % (len(failed), len(outcomes)), **self.results)
+
+    def send(self, index: int) -> 'Dict[str,Any]':
+        '''
+        Sends a call, unless its check matches or it would write in check mode.
+        '''
+        call = self.calls[index]
+        write = call['method'] != 'GET'
+
+        if call['check'] is not None and self.matches(call):
+            return dict(changed=False, skipped=True, failed=False)
+
+        if write and self.check_mode:
+            return dict(changed=True, skipped=True, failed=False)
+
+        if call['method'] == 'GET':
+            result = self.client.get(call['path'], **(call['body'] or {}))
+        else:
+            self.debug("Sending %s %s" % (call['method'], call['path']))
+            result = self.client.call(call['method'], call['path'], call['body'])
+
+        return dict(changed=write, skipped=False, failed=False, result=result)
+
+    def matches(self, call: 'Dict[str,Any]') -> bool:
+        from ovh.exceptions import ResourceNotFoundError
+
+        check = call['check']
+        match = check['match'] if check['match'] is not None else call['body']
+
+        try:
+            current = self.client.get(check['path'] or call['path'])
+        except ResourceNotFoundError:
+            return check['state'] == 'absent'
+
+        return check['state'] == 'present' and (match is None or contains(current, match))
+
+
+def main():
+    """Main execution"""
+    ApiModule()
+
+
+if __name__ == '__main__':
+    main()
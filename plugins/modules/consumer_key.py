@@ -6,14 +6,12 @@ try:
     from typing import TYPE_CHECKING
 
     if TYPE_CHECKING:
-        from typing import Dict, List, Optional
-except ImportError:
-    TYPE_CHECKING = False
+        from typing import Any, Dict, List
 
-try:
-    import ovh
+        from ansible_collections.holyhope.ovh.plugins.module_utils.client import \
+            Client
 except ImportError:
-    ovh = None
+    TYPE_CHECKING = False
 
 try:
     from warnings import warn
@@ -21,8 +19,14 @@ except ImportError:
     def warn(*args, **kwargs):  # type: ignore
         None
 
-from ansible_collections.holyhope.ovh.plugins.module_utils.authenticated import \
-    AuthenticatedOVHModuleBase
+from ansible_collections.holyhope.ovh.plugins.module_utils.authenticated import (
+    ACCOUNTS_ARGS, AuthenticatedOVHModuleBase)
+from ansible_collections.holyhope.ovh.plugins.module_utils.credentials import \
+    get_credential
+from ansible_collections.holyhope.ovh.plugins.module_utils.parallel import (
+    DEFAULT_CONCURRENCY, imap_bounded)
+from ansible_collections.holyhope.ovh.plugins.module_utils.validation import (
+    ALL_CREDENTIALS, check_type_credential_ids)
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
                     'status': ['preview'],
@@ -41,8 +45,22 @@ options:
             - Credential ID to manage.
               If id is None, use consumer_key.
         required: false
+    subject_credential_ids:
+        description:
+            - Credential IDs to inspect in a single run, or C(all) to inspect every credential of the account.
+            - Mutually exclusive with I(subject_credential_id).
+        type: raw
+        required: false
+    concurrency:
+        description:
+            - Maximum number of credentials fetched at the same time when I(subject_credential_ids) is set.
+        type: int
+        default: 10
+        required: false
 extends_documentation_fragment:
     - holyhope.ovh.ovh_api
+    - holyhope.ovh.ovh_api.accounts
+    - holyhope.ovh.ovh_api.profile
 author:
     - Pierre PÉRONNET <pierre.peronnet@ovhcloud.com>
 '''
@@ -62,6 +80,20 @@ EXAMPLES = '''
         consumer_key: abcde
         subject_credential_id: 1234
       register: ovh
+
+    - name: Audit every credential of the account
+      holyhope.ovh.consumer_key:
+        application_key: abcde
+        application_secret: abcde
+        consumer_key: abcde
+        subject_credential_ids: all
+        concurrency: 20
+      register: ovh
+
+    - name: Check the key of every account at once
+      holyhope.ovh.consumer_key:
+        accounts: "{{ ovh_accounts }}"
+      register: ovh
 '''
 
 RETURN = '''
@@ -83,6 +115,28 @@ accesses:
     returned: if credential is valid
     type: dict
     sample: {"/me/*": ["GET"]}
+credentials:
+    description:
+        - The state, id and accesses of each credential, keyed by credential id.
+    returned: if subject_credential_ids is set
+    type: dict
+    sample: {"1234": {"state": "validated", "credential_id": 1234, "accesses": {"/me/*": ["GET"]}}}
+missing:
+    description:
+        - The ids of I(subject_credential_ids) which do not exist, sorted. A warning lists them too.
+        - Credentials deleted while every credential (C(all)) is inspected are skipped instead.
+    returned: if subject_credential_ids is set
+    type: list
+    elements: int
+    sample: [5678]
+accounts:
+    description:
+        - The results of each account, in the order of I(accounts), with the errors of I(subject_credential_ids).
+    returned: if accounts is set
+    type: list
+    elements: dict
+    sample: [{"name": "eu", "endpoint": "ovh-eu", "application_key": "abcde", "failed": false,
+              "state": "validated", "credential_id": 1234, "accesses": {"/me/*": ["GET"]}}]
 '''
 
 
@@ -95,62 +149,106 @@ class ConsumerKeyModule(AuthenticatedOVHModuleBase):
                 type='int',
                 required=False,
             ),
+            subject_credential_ids=dict(
+                type=check_type_credential_ids,
+                required=False,
+            ),
+            concurrency=dict(
+                type='int',
+                required=False,
+                default=DEFAULT_CONCURRENCY,
+            ),
         )
 
-        super().__init__(self.module_arg_spec, supports_check_mode=True)
+        self.module_arg_spec.update(ACCOUNTS_ARGS)
+
+        super().__init__(self.module_arg_spec, supports_check_mode=True,
+                         mutually_exclusive=[('subject_credential_id', 'subject_credential_ids'),
+                                             ('accounts', 'consumer_key')])
 
     def exec_module(self, **kwargs):
         """Main module execution method"""
-        creds = self.subject_credential()
+        if self.accounts:
+            return self.exec_accounts(self.query)
+
+        results = self.query(self.client)
+        errors = results.pop('errors', None)
+
+        self.results = results
+
+        if results.get('missing'):
+            self.module.warn("credential(s) not found: %s" % ', '.join(str(i) for i in results['missing']))
+
+        if errors:
+            self.fail("failed to fetch %d credential(s)" % len(errors), errors=errors, **self.results)
 
-        self.update_results(
-            creds['status'],
-            creds['credentialId'],
-            self._transform_accesses(creds['rules'])
+    def query(self, client: 'Client') -> 'Dict[str,Any]':
+        if self.subject_credential_ids is not None:
+            return self.query_bulk(client)
+
+        creds = self.subject_credential(client)
+
+        return dict(
+            state=creds['status'],
+            credential_id=creds['credentialId'],
+            accesses=creds['accesses'],
         )
 
-    def subject_credential(self):
-        default_value = dict(
+    def query_bulk(self, client: 'Client') -> 'Dict[str,Any]':
+        from ovh.exceptions import ResourceNotFoundError
+
+        ids = self.subject_credential_ids
+        requested = ids != ALL_CREDENTIALS
+        if not requested:
+            self.debug("Listing credentials")
+            ids = client.iter_get('/me/api/credential')
+
+        def fetch_credential(credential_id: int) -> 'Dict[str,Any]':
+            return get_credential(client, '/me/api/credential/%d' % credential_id)
+
+        credentials: 'Dict[int,Dict[str,Any]]' = {}
+        errors: 'Dict[int,str]' = {}
+        missing: 'List[int]' = []
+
+        for credential_id, creds, error in imap_bounded(fetch_credential, ids, self.concurrency):
+            if isinstance(error, ResourceNotFoundError):
+                # Listed credentials may have been deleted since, requested ones are reported.
+                if requested:
+                    missing.append(credential_id)
+                continue
+
+            if error is not None:
+                errors[credential_id] = str(error)
+                continue
+
+            credentials[credential_id] = dict(
+                state=creds['status'],
+                credential_id=creds['credentialId'],
+                accesses=creds['accesses'],
+            )
+
+        return dict(credentials=credentials, missing=sorted(missing), errors=errors)
+
+    def subject_credential(self, client: 'Client') -> 'Dict[str,Any]':
+        from ovh.exceptions import InvalidCredential
+
+        default_value: 'Dict[str,Any]' = dict(
             status=None,
             credentialId=None,
-            rules=None,
+            accesses={},
         )
 
         if self.subject_credential_id is not None:
-            default_value.update(self.client.get('/me/api/credential/%d', self.subject_credential_id))
+            default_value.update(get_credential(client, '/me/api/credential/%d' % self.subject_credential_id))
             return default_value
 
         try:
-            default_value.update(self.client.get('/auth/currentCredential'))
+            default_value.update(get_credential(client, '/auth/currentCredential'))
             return default_value
-        except ovh.InvalidCredential as e:
+        except InvalidCredential as e:
             warn("invalid credentials", RuntimeWarning, source=e)
             return default_value
 
-    def update_results(self, state: 'Optional[str]', credential_id: 'Optional[int]',
-                       accesses: 'Optional[Dict[str,List[str]]]'):
-        self.results = dict(
-            state=state,
-            credential_id=credential_id,
-            accesses=accesses,
-        )
-
-    def _transform_accesses(self, rules: 'List[Dict[str,str]]') -> 'Dict[str,List[str]]':
-        accesses: 'Dict[str,List[str]]' = {}
-
-        if not rules:
-            return accesses
-
-        for rule in rules:
-            path, method = rule['path'], rule['method']
-
-            if path not in accesses:
-                accesses[path] = [method]
-            else:
-                accesses[path].append(method)
-
-        return accesses
-
 
 def main():
     """Main execution"""
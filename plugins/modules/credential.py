@@ -0,0 +1,193 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+
+    if TYPE_CHECKING:
+        from typing import Any, Dict, List, Optional
+except ImportError:
+    TYPE_CHECKING = False
+
+
+from ansible_collections.holyhope.ovh.plugins.module_utils.authenticated import \
+    AuthenticatedOVHModuleBase
+from ansible_collections.holyhope.ovh.plugins.module_utils.credentials import (
+    CREDENTIALS_PATH, get_credential, plan_credential, summarize)
+from ansible_collections.holyhope.ovh.plugins.module_utils.ips import \
+    normalize_ips
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'holyhope'}
+
+DOCUMENTATION = '''
+---
+module: credential
+version_added: "0.0.1"
+short_description: Manage the state of a credential
+description:
+    - Ensure a credential is present, validated or absent, and only usable from the given ips.
+    - The credential is fetched once and the writes are computed locally: a converged credential costs a
+      single API call, and check mode never does more than that call.
+options:
+    subject_credential_id:
+        description:
+            - Credential ID to manage.
+              If id is None, use consumer_key.
+        type: int
+        required: false
+    state:
+        description:
+            - C(present) and C(validated) update the allowed ips of an existing credential, C(validated)
+              also fails if the credential was not validated by its owner yet.
+            - C(absent) deletes the credential.
+            - Credentials are created with M(holyhope.ovh.new_consumer_key).
+        type: str
+        choices: [present, absent, validated]
+        default: present
+        required: false
+    ips:
+        description:
+            - The ips and networks allowed to use the credential.
+            - They are aggregated before being compared to the current ones.
+            - A network with host bits set, like C(10.0.0.1/24), stands for the network holding it.
+            - If not set, the allowed ips are left unchanged.
+        type: list
+        elements: str
+        required: false
+extends_documentation_fragment:
+    - holyhope.ovh.ovh_api
+    - holyhope.ovh.ovh_api.profile
+author:
+    - Pierre PÉRONNET <pierre.peronnet@ovhcloud.com>
+'''
+
+EXAMPLES = '''
+    - name: Restrict the key used by Ansible to the bastion
+      holyhope.ovh.credential:
+        application_key: abcde
+        application_secret: abcde
+        consumer_key: "{{ ovh.consumer_key }}"
+        state: validated
+        ips:
+        - 192.0.2.0/24
+
+    - name: Revoke a credential
+      holyhope.ovh.credential:
+        application_key: abcde
+        application_secret: abcde
+        consumer_key: abcde
+        subject_credential_id: 1234
+        state: absent
+'''
+
+RETURN = '''
+credential:
+    description:
+        - The credential, as it is after the run, or would be in check mode.
+    returned: unless state is absent
+    type: dict
+    sample: {"credential_id": 1234, "application_id": 42, "status": "validated",
+             "creation": "2021-01-01T00:00:00+00:00", "expiration": null, "last_use": null,
+             "allowed_ips": ["192.0.2.0/24"], "accesses": {"/me/*": ["GET"]}}
+plan:
+    description:
+        - The writes applied, or which would be applied in check mode.
+    returned: always
+    type: list
+    elements: dict
+    sample: [{"action": "update", "allowed_ips": ["192.0.2.0/24"], "added": ["192.0.2.0/24"], "removed": []}]
+'''
+
+
+class CredentialModule(AuthenticatedOVHModuleBase):
+    """Configuration class to reconcile a credential"""
+
+    def __init__(self):
+        self.module_arg_spec = dict(
+            subject_credential_id=dict(
+                type='int',
+                required=False,
+            ),
+            state=dict(
+                type='str',
+                choices=['present', 'absent', 'validated'],
+                default='present',
+                required=False,
+            ),
+            ips=dict(
+                type='list',
+                elements='str',
+                required=False,
+            ),
+        )
+
+        super().__init__(self.module_arg_spec, supports_check_mode=True)
+
+    def exec_module(self, **kwargs):
+        """Main module execution method"""
+        ips: 'Optional[List[str]]' = None
+        if self.ips is not None:
+            try:
+                ips = normalize_ips(self.ips)
+            except ValueError as e:
+                self.fail("invalid ips: %s" % e)
+
+        current = self.fetch()
+
+        if current is None and self.state != 'absent':
+            self.fail("credential %s does not exist" % self.subject_credential_id)
+
+        if self.state == 'validated' and current['status'] != 'validated':
+            self.fail("credential %d is %s, its owner must validate it first"
+                      % (current['credentialId'], current['status']), credential=summarize(current))
+
+        try:
+            plan = plan_credential(current, self.state, ips)
+        except ValueError as e:
+            self.fail("invalid allowed ips of credential %d: %s" % (current['credentialId'], e))
+        self.results['plan'] = plan
+        self.set_changed(bool(plan))
+
+        if not self.check_mode:
+            for write in plan:
+                self.apply(current, write)
+
+        if self.state != 'absent':
+            for write in plan:
+                current = dict(current, allowedIPs=write['allowed_ips'])
+            self.results['credential'] = summarize(current)
+
+    def fetch(self) -> 'Optional[Dict[str,Any]]':
+        from ovh.exceptions import ResourceNotFoundError
+
+        self.debug("Getting consumer key information")
+
+        if self.subject_credential_id is None:
+            return get_credential(self.client, '/auth/currentCredential')
+
+        try:
+            return get_credential(self.client, '%s/%d' % (CREDENTIALS_PATH, self.subject_credential_id))
+        except ResourceNotFoundError:
+            return None
+
+    def apply(self, current: 'Dict[str,Any]', write: 'Dict[str,Any]'):
+        path = '%s/%d' % (CREDENTIALS_PATH, current['credentialId'])
+
+        if write['action'] == 'delete':
+            self.debug("Deleting consumer key")
+            self.client.delete(path)
+        elif write['action'] == 'update':
+            self.debug("Updating consumer key allowed ips")
+            self.client.put(path, allowedIPs=write['allowed_ips'])
+
+
+def main():
+    """Main execution"""
+    CredentialModule()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+
+    if TYPE_CHECKING:
+        from typing import Any, Dict, Iterable, List
+
+        from ansible_collections.holyhope.ovh.plugins.module_utils.client import \
+            Client
+except ImportError:
+    TYPE_CHECKING = False
+
+from itertools import islice
+
+from ansible_collections.holyhope.ovh.plugins.module_utils.authenticated import (
+    ACCOUNTS_ARGS, AuthenticatedOVHModuleBase)
+from ansible_collections.holyhope.ovh.plugins.module_utils.credentials import (
+    CREDENTIAL_STATUSES, CREDENTIALS_PATH, credential_filter, iter_credentials,
+    list_query, summarize)
+from ansible_collections.holyhope.ovh.plugins.module_utils.parallel import \
+    DEFAULT_CONCURRENCY
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'holyhope'}
+
+DOCUMENTATION = '''
+---
+module: credentials_info
+version_added: "0.0.1"
+short_description: List the API credentials of the account
+description:
+    - List the credentials of C(/me/api/credential) matching every given filter.
+    - Details are fetched concurrently and filtered as soon as they are received, so that
+      accounts with tens of thousands of credentials can be scanned with a bounded memory usage.
+    - With I(accounts), the credentials of every account are listed at the same time.
+options:
+    status:
+        description:
+            - Only return the credentials with one of these statuses.
+        type: list
+        elements: str
+        choices: [expired, pendingValidation, refused, validated]
+        required: false
+    application_ids:
+        description:
+            - Only return the credentials of these applications.
+        type: list
+        elements: int
+        required: false
+    expires_within:
+        description:
+            - Only return the credentials expiring within this number of days.
+        type: int
+        required: false
+    unused_for:
+        description:
+            - Only return the credentials not used for this number of days, or never used.
+        type: int
+        required: false
+    older_than:
+        description:
+            - Only return the credentials created more than this number of days ago.
+        type: int
+        required: false
+    limit:
+        description:
+            - Only return the matching credentials with the lowest ids, up to this number.
+            - Credentials are still fetched concurrently, and no more are fetched once enough matched.
+        type: int
+        required: false
+    concurrency:
+        description:
+            - Maximum number of credentials fetched at the same time.
+        type: int
+        default: 10
+        required: false
+extends_documentation_fragment:
+    - holyhope.ovh.ovh_api
+    - holyhope.ovh.ovh_api.accounts
+    - holyhope.ovh.ovh_api.profile
+author:
+    - Pierre PÉRONNET <pierre.peronnet@ovhcloud.com>
+'''
+
+EXAMPLES = '''
+    - name: List the credentials which were not used for 3 months
+      holyhope.ovh.credentials_info:
+        application_key: abcde
+        application_secret: abcde
+        consumer_key: abcde
+        status:
+        - validated
+        unused_for: 90
+      register: ovh
+
+    - name: Find a few credentials about to expire
+      holyhope.ovh.credentials_info:
+        application_key: abcde
+        application_secret: abcde
+        consumer_key: abcde
+        expires_within: 7
+        limit: 10
+        concurrency: 20
+      register: ovh
+
+    - name: Audit the credentials of every region
+      holyhope.ovh.credentials_info:
+        accounts:
+        - name: eu
+          endpoint: ovh-eu
+          application_key: abcde
+          application_secret: abcde
+          consumer_key: abcde
+        - name: ca
+          endpoint: ovh-ca
+          application_key: fghij
+          application_secret: fghij
+          consumer_key: fghij
+        unused_for: 90
+      register: ovh
+'''
+
+RETURN = '''
+credentials:
+    description:
+        - The matching credentials, sorted by id.
+    returned: unless accounts is set
+    type: list
+    elements: dict
+    sample: [{"credential_id": 1234, "application_id": 42, "status": "validated",
+              "creation": "2021-01-01T00:00:00+00:00", "expiration": null, "last_use": null,
+              "allowed_ips": null, "accesses": {"/me/*": ["GET"]}}]
+scanned:
+    description:
+        - The number of credentials fetched.
+    returned: unless accounts is set
+    type: int
+    sample: 100
+accounts:
+    description:
+        - The credentials, scanned count and fetch errors of each account, in the order of I(accounts).
+    returned: if accounts is set
+    type: list
+    elements: dict
+    sample: [{"name": "eu", "endpoint": "ovh-eu", "application_key": "abcde", "failed": false,
+              "credentials": [], "scanned": 100, "errors": {}}]
+'''
+
+
+class CredentialsInfoModule(AuthenticatedOVHModuleBase):
+    """Configuration class to list credentials"""
+
+    def __init__(self):
+        self.module_arg_spec = dict(
+            status=dict(
+                type='list',
+                elements='str',
+                choices=CREDENTIAL_STATUSES,
+                required=False,
+            ),
+            application_ids=dict(
+                type='list',
+                elements='int',
+                required=False,
+            ),
+            expires_within=dict(
+                type='int',
+                required=False,
+            ),
+            unused_for=dict(
+                type='int',
+                required=False,
+            ),
+            older_than=dict(
+                type='int',
+                required=False,
+            ),
+            limit=dict(
+                type='int',
+                required=False,
+            ),
+            concurrency=dict(
+                type='int',
+                required=False,
+                default=DEFAULT_CONCURRENCY,
+            ),
+        )
+        self.module_arg_spec.update(ACCOUNTS_ARGS)
+
+        super().__init__(self.module_arg_spec, supports_check_mode=True,
+                         mutually_exclusive=[('accounts', 'consumer_key')])
+
+    def exec_module(self, **kwargs):
+        """Main module execution method"""
+        if self.limit is not None and self.limit < 0:
+            self.fail("value of limit must be positive or zero, got: %d" % self.limit)
+
+        if self.accounts:
+            return self.exec_accounts(self.query)
+
+        results = self.query(self.client)
+        errors = results.pop('errors')
+
+        self.results = results
+
+        if errors:
+            self.fail("failed to fetch %d credential(s)" % len(errors), errors=errors, **self.results)
+
+    def query(self, client: 'Client') -> 'Dict[str,Any]':
+        '''
+        Returns the matching credentials of the account of client, the number scanned and the fetch errors.
+        '''
+        self.debug("Listing credentials")
+        ids: 'Iterable[int]' = client.iter_get(CREDENTIALS_PATH, **list_query(self.status, self.application_ids))
+        if self.limit is not None:
+            # Fetch in a fixed order, so that the same credentials are returned by every run.
+            ids = sorted(ids)
+
+        matches = credential_filter(
+            status=self.status,
+            application_ids=self.application_ids,
+            expires_within=self.expires_within,
+            unused_for=self.unused_for,
+            older_than=self.older_than,
+        )
+
+        errors: 'Dict[int,str]' = {}
+        scanned = [0]
+
+        def fetched():
+            for credential in iter_credentials(client, ids, self.concurrency, errors, ordered=self.limit is not None):
+                scanned[0] += 1
+                yield credential
+
+        # Credentials are summarized once matched: the others are dropped as soon as they are received.
+        credentials: 'List[Dict[str,Any]]' = [
+            summarize(credential) for credential in islice(filter(matches, fetched()), self.limit)
+        ]
+        credentials.sort(key=lambda credential: credential['credential_id'])
+
+        return dict(
+            credentials=credentials,
+            scanned=scanned[0],
+            errors=errors,
+        )
+
+
+def main():
+    """Main execution"""
+    CredentialsInfoModule()
+
+
+if __name__ == '__main__':
+    main()
@@ -6,19 +6,16 @@ try:
     from typing import TYPE_CHECKING
 
     if TYPE_CHECKING:
-        from typing import Dict, List
+        from typing import Any, Dict, List, Optional, Tuple
 except ImportError:
     TYPE_CHECKING = False
 
-try:
-    import ovh
-except ImportError:
-    ovh = None
-
 from ansible_collections.holyhope.ovh.plugins.module_utils.common import \
     OVHModuleBase
-from ansible_collections.holyhope.ovh.plugins.module_utils.validation import \
-    check_type_accesses
+from ansible_collections.holyhope.ovh.plugins.module_utils.parallel import (
+    DEFAULT_CONCURRENCY, imap_bounded)
+from ansible_collections.holyhope.ovh.plugins.module_utils.validation import (
+    check_type_accesses, compile_accesses)
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
                     'status': ['preview'],
@@ -35,13 +32,43 @@ options:
     accesses:
         description:
             - The accesses to request.
-        required: true
+            - Required unless I(keys) is set.
+        required: false
     redirect_url:
         description:
             - The url to redirect to once logged in.
         required: false
+    keys:
+        description:
+            - Create several consumer keys concurrently, one for each item.
+            - Mutually exclusive with I(accesses).
+        type: list
+        elements: dict
+        required: false
+        suboptions:
+            name:
+                description:
+                    - Name of the key, returned with it.
+                type: str
+                required: false
+            accesses:
+                description:
+                    - The accesses to request.
+                required: true
+            redirect_url:
+                description:
+                    - The url to redirect to once logged in.
+                type: str
+                required: false
+    concurrency:
+        description:
+            - Maximum number of consumer keys created at the same time when I(keys) is set.
+        type: int
+        default: 10
+        required: false
 extends_documentation_fragment:
     - holyhope.ovh.ovh_api
+    - holyhope.ovh.ovh_api.profile
 author:
     - Pierre PÉRONNET <pierre.peronnet@ovhcloud.com>
 '''
@@ -52,6 +79,17 @@ EXAMPLES = '''
         accesses:
           '/me/*': ["GET"]
       register: ovh
+
+    - name: Create consumer keys for several services
+      holyhope.ovh.new_consumer_key:
+        keys:
+          - name: billing
+            accesses:
+              '/me/bill/*': ["GET"]
+          - name: dns
+            accesses:
+              '/domain/*': ["GET", "PUT"]
+      register: ovh
 '''
 
 RETURN = '''
@@ -66,6 +104,18 @@ validation_url:
         - The url to validate the consumer key.
     returned: if consumer_key input was empty.
     sample: https://...
+eliminated_rules:
+    description:
+        - The number of requested rules dropped because they were duplicated or already granted by a wildcard rule.
+    returned: always
+    type: int
+    sample: 3
+consumer_keys:
+    description:
+        - The created keys, in the order of I(keys), with their name, consumer_key, validation_url and eliminated_rules.
+    returned: if keys is set
+    type: list
+    sample: [{"name": "billing", "consumer_key": "abcdef", "validation_url": "https://...", "eliminated_rules": 0}]
 '''
 
 
@@ -76,43 +126,108 @@ class NewConsumerKeyModule(OVHModuleBase):
         self.module_arg_spec = dict(
             accesses=dict(
                 type=check_type_accesses,
-                required=True,
+                required=False,
             ),
             redirect_url=dict(
                 type='str',
                 required=False,
             ),
+            keys=dict(
+                type='list',
+                elements='dict',
+                required=False,
+                no_log=False,
+                options=dict(
+                    name=dict(
+                        type='str',
+                        required=False,
+                    ),
+                    accesses=dict(
+                        type=check_type_accesses,
+                        required=True,
+                    ),
+                    redirect_url=dict(
+                        type='str',
+                        required=False,
+                    ),
+                ),
+            ),
+            concurrency=dict(
+                type='int',
+                required=False,
+                default=DEFAULT_CONCURRENCY,
+            ),
         )
 
-        super().__init__(self.module_arg_spec, supports_check_mode=True)
+        super().__init__(self.module_arg_spec, supports_check_mode=True,
+                         mutually_exclusive=[('accesses', 'keys')],
+                         required_one_of=[('accesses', 'keys')])
 
     def exec_module(self, **kwargs):
         """Main module execution method"""
+        if self.keys is not None:
+            return self.exec_batch()
+
         self.debug("Creating the consumer key")
 
-        ck = self.delegated_client() \
-            .request_consumerkey(self._transform_accesses(self.accesses), self.redirect_url)
+        rules, eliminated_rules = self._transform_accesses(self.accesses)
 
-        self.update_results(True, ck['consumerKey'], ck['validationUrl'])
+        ck = self.request_consumer_key(rules, self.redirect_url)
 
-    def _transform_accesses(self, accesses: 'Dict[str,List[str]]') -> 'List[Dict[str,str]]':
-        rules: 'List[Dict[str,str]]' = []
+        self.update_results(True, ck['consumerKey'], ck['validationUrl'], eliminated_rules)
 
-        if not accesses:
-            return rules
+    def exec_batch(self):
+        self.debug("Creating %d consumer keys" % len(self.keys))
+
+        def create(index: int) -> 'Dict[str,Any]':
+            spec = self.keys[index]
+            rules, eliminated_rules = self._transform_accesses(spec['accesses'])
+            ck = self.request_consumer_key(rules, spec['redirect_url'])
 
-        for endpoint, methods in accesses.items():
-            for method in methods:
-                rules.append({'path': endpoint, 'method': method})
+            return dict(
+                name=spec['name'],
+                consumer_key=ck['consumerKey'],
+                validation_url=ck['validationUrl'],
+                eliminated_rules=eliminated_rules,
+            )
 
-        return rules
+        consumer_keys: 'List[Optional[Dict[str,Any]]]' = [None] * len(self.keys)
+        errors: 'Dict[int,str]' = {}
+
+        for index, ck, error in imap_bounded(create, range(len(self.keys)), self.concurrency):
+            if error is not None:
+                errors[index] = str(error)
+            else:
+                consumer_keys[index] = ck
+
+        self.results = dict(changed=any(consumer_keys), consumer_keys=consumer_keys)
+
+        if errors:
+            self.fail("failed to create %d consumer key(s)" % len(errors), errors=errors, **self.results)
+
+    def request_consumer_key(self, rules: 'List[Dict[str,str]]', redirect_url: 'Optional[str]') -> 'Dict[str,Any]':
+        '''
+        Same as ovh.Client.request_consumerkey, without storing the new key in the pooled client.
+        '''
+        return self.delegated_client().post(
+            '/auth/credential',
+            _need_auth=False,
+            accessRules=rules,
+            redirection=redirect_url,
+        )
+
+    def _transform_accesses(self, accesses: 'Dict[str,List[str]]') -> 'Tuple[List[Dict[str,str]], int]':
+        if not accesses:
+            return [], 0
 
-    def update_results(self, changed: bool, consumer_key: str, validation_url: str):
-        self.set_changed(changed)
+        return compile_accesses(accesses)
 
+    def update_results(self, changed: bool, consumer_key: str, validation_url: str, eliminated_rules: int = 0):
         self.results = dict(
+            changed=changed,
             consumer_key=consumer_key,
             validation_url=validation_url,
+            eliminated_rules=eliminated_rules,
         )
 
 
@@ -0,0 +1,247 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+
+    if TYPE_CHECKING:
+        from typing import Any, Dict, Iterable, Iterator
+except ImportError:
+    TYPE_CHECKING = False
+
+from itertools import islice
+
+from ansible_collections.holyhope.ovh.plugins.module_utils.authenticated import \
+    AuthenticatedOVHModuleBase
+from ansible_collections.holyhope.ovh.plugins.module_utils.credentials import (
+    CREDENTIAL_STATUSES, CREDENTIALS_PATH, credential_filter, iter_credentials,
+    list_query, summarize)
+from ansible_collections.holyhope.ovh.plugins.module_utils.parallel import (
+    DEFAULT_CONCURRENCY, imap_bounded)
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'holyhope'}
+
+DOCUMENTATION = '''
+---
+module: prune_credentials
+version_added: "0.0.1"
+short_description: Delete stale API credentials
+description:
+    - Delete the credentials of C(/me/api/credential) matching every given filter.
+    - Credentials are deleted concurrently as soon as they are found to match.
+    - In check mode, the credentials which would be deleted are returned without any write call.
+options:
+    status:
+        description:
+            - Only delete the credentials with one of these statuses.
+        type: list
+        elements: str
+        choices: [expired, pendingValidation, refused, validated]
+        required: false
+    application_ids:
+        description:
+            - Only delete the credentials of these applications.
+        type: list
+        elements: int
+        required: false
+    unused_for:
+        description:
+            - Only delete the credentials not used for this number of days, or never used.
+        type: int
+        required: false
+    older_than:
+        description:
+            - Only delete the credentials created more than this number of days ago.
+        type: int
+        required: false
+    exclude_current:
+        description:
+            - Never delete the credential of I(consumer_key), used by this module.
+        type: bool
+        default: true
+        required: false
+    limit:
+        description:
+            - Maximum number of credentials to delete, the matching ones with the lowest ids.
+            - Credentials are then fetched in order, so that check mode returns the exact deletion plan.
+        type: int
+        required: false
+    concurrency:
+        description:
+            - Maximum number of credentials fetched, and deleted, at the same time.
+        type: int
+        default: 10
+        required: false
+extends_documentation_fragment:
+    - holyhope.ovh.ovh_api
+    - holyhope.ovh.ovh_api.profile
+author:
+    - Pierre PÉRONNET <pierre.peronnet@ovhcloud.com>
+'''
+
+EXAMPLES = '''
+    - name: Show the keys which were never validated
+      holyhope.ovh.prune_credentials:
+        application_key: abcde
+        application_secret: abcde
+        consumer_key: abcde
+        status:
+        - pendingValidation
+        - refused
+        older_than: 1
+      check_mode: true
+      register: plan
+
+    - name: Delete the expired keys and the ones unused for a year
+      holyhope.ovh.prune_credentials:
+        application_key: abcde
+        application_secret: abcde
+        consumer_key: abcde
+        unused_for: 365
+        concurrency: 20
+'''
+
+RETURN = '''
+credentials:
+    description:
+        - The credentials deleted, or which would be deleted in check mode, sorted by id.
+    returned: always
+    type: list
+    elements: dict
+    sample: [{"credential_id": 1234, "application_id": 42, "status": "pendingValidation",
+              "creation": "2021-01-01T00:00:00+00:00", "expiration": null, "last_use": null,
+              "allowed_ips": null, "accesses": {"/me/*": ["GET"]}}]
+deleted:
+    description:
+        - The ids of the deleted credentials.
+    returned: always
+    type: list
+    elements: int
+    sample: [1234]
+scanned:
+    description:
+        - The number of credentials fetched.
+    returned: always
+    type: int
+    sample: 100
+'''
+
+
+class PruneCredentialsModule(AuthenticatedOVHModuleBase):
+    """Configuration class to delete credentials"""
+
+    def __init__(self):
+        self.module_arg_spec = dict(
+            status=dict(
+                type='list',
+                elements='str',
+                choices=CREDENTIAL_STATUSES,
+                required=False,
+            ),
+            application_ids=dict(
+                type='list',
+                elements='int',
+                required=False,
+            ),
+            unused_for=dict(
+                type='int',
+                required=False,
+            ),
+            older_than=dict(
+                type='int',
+                required=False,
+            ),
+            exclude_current=dict(
+                type='bool',
+                required=False,
+                default=True,
+            ),
+            limit=dict(
+                type='int',
+                required=False,
+            ),
+            concurrency=dict(
+                type='int',
+                required=False,
+                default=DEFAULT_CONCURRENCY,
+            ),
+        )
+
+        # Without a criterion, every credential of the account would be deleted.
+        super().__init__(self.module_arg_spec, supports_check_mode=True,
+                         required_one_of=[('status', 'application_ids', 'unused_for', 'older_than')])
+
+    def exec_module(self, **kwargs):
+        """Main module execution method"""
+        if self.limit is not None and self.limit < 0:
+            self.fail("value of limit must be positive or zero, got: %d" % self.limit)
+
+        excluded = set()
+        if self.exclude_current:
+            excluded.add(self.client.get('/auth/currentCredential')['credentialId'])
+
+        self.debug("Listing credentials")
+        ids: 'Iterable[int]' = (
+            credential_id
+            for credential_id in self.client.iter_get(CREDENTIALS_PATH, **list_query(self.status, self.application_ids))
+            if credential_id not in excluded
+        )
+        if self.limit is not None:
+            # Fetch in a fixed order, so that the same credentials are selected by every run.
+            ids = sorted(ids)
+
+        errors: 'Dict[int,str]' = {}
+        self.results = dict(changed=False, credentials=[], deleted=[], scanned=0)
+
+        selected = islice(filter(credential_filter(
+            status=self.status,
+            application_ids=self.application_ids,
+            unused_for=self.unused_for,
+            older_than=self.older_than,
+        ), self.scan(ids, errors)), self.limit)
+
+        if self.check_mode:
+            self.results['credentials'] = [summarize(credential) for credential in selected]
+        else:
+            self.delete(selected, errors)
+
+        self.results['credentials'].sort(key=lambda credential: credential['credential_id'])
+        self.results['deleted'].sort()
+
+        if errors:
+            self.fail("failed to prune %d credential(s)" % len(errors), errors=errors, **self.results)
+
+    def scan(self, ids: 'Iterable[int]', errors: 'Dict[int,str]') -> 'Iterator[Dict[str,Any]]':
+        for credential in iter_credentials(self.client, ids, self.concurrency, errors, ordered=self.limit is not None):
+            self.results['scanned'] += 1
+            yield credential
+
+    def delete(self, credentials: 'Iterator[Dict[str,Any]]', errors: 'Dict[int,str]'):
+        from ovh.exceptions import ResourceNotFoundError
+
+        def delete(credential: 'Dict[str,Any]'):
+            self.client.delete('%s/%d' % (CREDENTIALS_PATH, credential['credentialId']))
+
+        for credential, _, error in imap_bounded(delete, credentials, self.concurrency):
+            if isinstance(error, ResourceNotFoundError):
+                continue
+
+            if error is not None:
+                errors[credential['credentialId']] = str(error)
+                continue
+
+            self.results['credentials'].append(summarize(credential))
+            self.results['deleted'].append(credential['credentialId'])
+            self.set_changed(True)
+
+
+def main():
+    """Main execution"""
+    PruneCredentialsModule()
+
+
+if __name__ == '__main__':
+    main()
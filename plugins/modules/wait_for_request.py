@@ -2,19 +2,22 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import re
+import time
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from socket import timeout
-from uuid import uuid4
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.common.validation import check_type_str
+from ansible_collections.holyhope.ovh.plugins.module_utils.profiling import (
+    PROFILE_ARGS, Profiler)
 
 try:
     from typing import TYPE_CHECKING
 
     if TYPE_CHECKING:
-        from typing import Callable, Optional, Type
+        from typing import Any, Callable, Dict, List, Optional, Type
 
     class Handler(BaseHTTPRequestHandler):
         raw_requestline: bytes
@@ -54,15 +57,46 @@ options:
         required: false
     response_headers:
         description:
-            - Headers to send to the client.
-        default:
-            Content-Type: "text/html;charset=utf-8",
-            Server: "Ansible - holyhole.ovh.wait_for_request"
+            - Headers to send to the client. They are not logged, since they may hold tokens.
+            - Defaults to C(Content-Type) C(text/html;charset=utf-8) and C(Server)
+              C(Ansible - holyhole.ovh.wait_for_request).
+        type: dict
+        required: false
     response_body:
         description:
             - The html content to send to the client when requesting the address:port.
         default: Success
         required: false
+    path_regex:
+        description:
+            - Only requests whose path matches this regular expression are captured.
+            - Other requests are answered with I(not_matching_status) and an empty body, and the module keeps waiting.
+        required: false
+    count:
+        description:
+            - The number of matching requests to capture before returning, at least 1.
+        default: 1
+        required: false
+    unique:
+        description:
+            - Only capture the first request of each path, e.g. one validation callback per consumer key.
+            - Later requests to a captured path, like a page refresh, are answered the same way but not counted.
+        type: bool
+        default: false
+        required: false
+    timeout:
+        description:
+            - Maximum number of seconds to wait for the requests. The module fails when it expires.
+            - 0 means no timeout.
+        default: 0
+        required: false
+    not_matching_status:
+        description:
+            - The status code to respond to requests which do not match I(path_regex).
+        default: 404
+        required: false
+extends_documentation_fragment:
+    - holyhope.ovh.ovh_api.profile
 author:
     - Pierre PÉRONNET <pierre.peronnet@ovhcloud.com>
 '''
@@ -71,6 +105,14 @@ EXAMPLES = '''
     - name: Wait for a HTTP request on a specific port.
       holyhope.ovh.wait_for_request:
         port: 8080
+
+    - name: Wait for 2 validation callbacks, ignoring other requests
+      holyhope.ovh.wait_for_request:
+        port: 8080
+        path_regex: '^/(key-a|key-b)/run-id$'
+        count: 2
+        unique: true
+        timeout: 900
 '''
 
 RETURN = '''
@@ -94,7 +136,7 @@ path:
     type: str
     returned: always
     sample: /the/request/path
-client_addr
+client_addr:
     description:
         - The ip address which sent the request.
     type: str
@@ -113,6 +155,11 @@ headers:
     returned: always
     sample:
         Host: "localhost:8080"
+requests:
+    description:
+        - Every captured request, with the same keys as the first one returned at the top level.
+    type: list
+    returned: always
 '''
 
 
@@ -120,6 +167,11 @@ class WaitForRequestModule(object):
     request_id_header = 'X-Request-ID'
     user_agent_header = 'User-Agent'
     default_content_type = "text/html;charset=utf-8"
+    default_response_headers = {
+        "Content-Type": default_content_type,
+        "Server": "Ansible - holyhole.ovh.wait_for_request",
+    }
+    request_timeout = 10
 
     def __init__(self):
         arg_spec = dict(
@@ -138,67 +190,158 @@ class WaitForRequestModule(object):
                 default='Success',
                 no_log=True,
             ),
+            # Not a default of the spec: ansible can not hide the values of a dict default.
             response_headers=dict(
-                type=dict,
+                type='dict',
                 required=False,
                 no_log=True,
-                default={
-                    "Content-Type": self.default_content_type,
-                    "Server": "Ansible - holyhole.ovh.wait_for_request",
-                },
             ),
             response_status=dict(
                 type=int,
                 required=False,
                 default=HTTPStatus.OK,
             ),
+            path_regex=dict(
+                type='str',
+                required=False,
+            ),
+            count=dict(
+                type='int',
+                required=False,
+                default=1,
+            ),
+            unique=dict(
+                type='bool',
+                required=False,
+                default=False,
+            ),
+            timeout=dict(
+                type='int',
+                required=False,
+                default=0,
+            ),
+            not_matching_status=dict(
+                type='int',
+                required=False,
+                default=HTTPStatus.NOT_FOUND,
+            ),
+            **PROFILE_ARGS
         )
 
-        self.request: 'Optional[BaseHTTPRequestHandler]' = None
+        self.requests: 'List[Dict[str,Any]]' = []
+        self.path_regex: 'Optional[re.Pattern]' = None
+        self.deadline: 'Optional[float]' = None
 
         self.module = AnsibleModule(argument_spec=arg_spec, supports_check_mode=True)
+
+        self.profiler = Profiler.from_params(self.module.params, self.module._name)
+        if self.profiler is not None:
+            self.profiler.start()
+
         self.exec()
 
     def exec(self):
         address = self.module.params.get('address')
         port = self.module.params.get('port')
+        count = self.module.params.get('count')
+        timeout = self.module.params.get('timeout')
+
+        if count < 1:
+            self.module.fail_json(msg='value of count must be at least 1, got: %d' % count, **self.with_profile({}))
+
+        if self.module.params.get('path_regex'):
+            try:
+                self.path_regex = re.compile(self.module.params.get('path_regex'))
+            except re.error as e:
+                self.module.fail_json(msg='invalid path_regex: %s' % e, **self.with_profile({}))
+
+        self.deadline = time.monotonic() + timeout if timeout > 0 else None
+        deadline = self.deadline
 
         with self.server((address, port), self.handler) as httpd:
             self.module.log("Waiting request", log_args=dict(server_address=httpd.server_address))
-            httpd.handle_request()
-
-        if self.request is None:
-            self.module.fail_json(msg='no valid request',)
-
-        self.module.exit_json(
-            changed=True,
-            request_id=self.request_id,
-            method=self.request.command,
-            path=self.request.path,
-            client_addr='%s:%d' % self.request.client_address,
-            user_agent=self.request.headers.get(self.user_agent_header),
-            headers=dict(self.request.headers)
-        )
+
+            while len(self.requests) < count:
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+
+                    # handle_request waits on a selector and returns when it expires
+                    httpd.timeout = remaining
+
+                httpd.handle_request()
+
+        if len(self.requests) < count:
+            self.module.fail_json(
+                msg='timed out after receiving %d of %d matching requests' % (len(self.requests), count),
+                **self.with_profile(dict(requests=self.requests))
+            )
+
+        self.module.exit_json(changed=True, **self.with_profile(dict(requests=self.requests, **self.requests[0])))
+
+    def with_profile(self, results: 'Dict[str,Any]') -> 'Dict[str,Any]':
+        '''
+        Adds the profile block to the results when requested.
+        '''
+        if self.profiler is not None:
+            results = dict(results, profile=self.profiler.stop())
+
+        return results
+
+    def matches(self, request: 'BaseHTTPRequestHandler') -> bool:
+        return self.path_regex is None or self.path_regex.search(request.path) is not None
 
     def handle(self, request: 'BaseHTTPRequestHandler') -> None:
         self.module.debug('request_received')
 
-        self.request = request
+        captured = self.module.params.get('unique') and any(
+            captured['path'] == request.path for captured in self.requests)
+
+        if not self.matches(request) or (len(self.requests) >= self.module.params.get('count') and not captured):
+            request.send_response(self.module.params.get('not_matching_status'))
+            request.send_header('Content-Length', '0')
+            request.end_headers()
+            return
 
         request.send_response(self.module.params.get('response_status'))
 
-        for k, v in self.module.params.get('response_headers', {}).items():
+        headers = self.module.params.get('response_headers')
+        if headers is None:
+            headers = self.default_response_headers
+
+        for k, v in headers.items():
             request.send_header(k, v)
 
-        self.request_id = request.headers.get(self.request_id_header, str(uuid4()))
-        request.send_header(self.request_id_header, self.request_id)
+        request_id = request.headers.get(self.request_id_header)
+        if request_id is None:
+            from uuid import uuid4
+            request_id = str(uuid4())
+        request.send_header(self.request_id_header, request_id)
 
         request.end_headers()
 
         request.wfile.write(self.module.params.get('response_body'))
 
+        if captured:
+            return
+
+        self.requests.append(dict(
+            request_id=request_id,
+            method=request.command,
+            path=request.path,
+            client_addr='%s:%d' % request.client_address[:2],
+            user_agent=request.headers.get(self.user_agent_header),
+            headers=dict(request.headers),
+        ))
+
     def handle_one_request(self, request: 'Handler'):
         """Copied form BaseHTTPRequestHandler"""
+        if self.deadline is not None:
+            # A client which connects without sending its request must not hold the module past its timeout.
+            remaining = self.deadline - time.monotonic()
+            request.connection.settimeout(max(0.001, min(self.request_timeout, remaining)))
+
         try:
             request.raw_requestline = request.rfile.readline(65537)
             if len(request.raw_requestline) > 65536:
@@ -231,6 +374,8 @@ class WaitForRequestModule(object):
     def handler(self) -> 'Type[Handler]':
         return type('Handler', (BaseHTTPRequestHandler,), {
             'handle_one_request': (lambda request: self.handle_one_request(request)),
+            # A client which connects without sending its request must not block the other ones.
+            'timeout': self.request_timeout,
         })
 
 
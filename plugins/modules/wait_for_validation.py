@@ -0,0 +1,273 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+
+    if TYPE_CHECKING:
+        from typing import Any, Dict, Iterator, List, Optional
+except ImportError:
+    TYPE_CHECKING = False
+
+import random
+import time
+
+from ansible_collections.holyhope.ovh.plugins.module_utils.common import \
+    OVHModuleBase
+from ansible_collections.holyhope.ovh.plugins.module_utils.parallel import (
+    DEFAULT_CONCURRENCY, imap_bounded)
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'holyhope'}
+
+DOCUMENTATION = '''
+---
+module: wait_for_validation
+version_added: "0.0.1"
+short_description: Wait for the validation of consumer keys
+description:
+    - Poll C(/auth/currentCredential) with new consumer keys until their owner validated them.
+    - Unlike M(holyhope.ovh.wait_for_request), nothing has to be reachable from the browser of the owner,
+      so it works from CI runners and behind NAT.
+    - Polls are frequent at first and slow down over time, until I(timeout).
+    - The module fails without waiting as soon as a consumer key is refused, expired or deleted.
+options:
+    consumer_keys:
+        description:
+            - The consumer keys to wait for.
+        type: list
+        elements: str
+        required: true
+    timeout:
+        description:
+            - Seconds to wait for the validation of every consumer key.
+        type: int
+        default: 900
+        required: false
+    initial_interval:
+        description:
+            - Seconds between the first polls.
+        type: float
+        default: 1
+        required: false
+    max_interval:
+        description:
+            - Maximum seconds between two polls.
+        type: float
+        default: 30
+        required: false
+    backoff_factor:
+        description:
+            - Factor applied to the interval after each poll.
+        type: float
+        default: 1.5
+        required: false
+    concurrency:
+        description:
+            - Maximum number of consumer keys polled at the same time.
+        type: int
+        default: 10
+        required: false
+extends_documentation_fragment:
+    - holyhope.ovh.ovh_api
+    - holyhope.ovh.ovh_api.profile
+author:
+    - Pierre PÉRONNET <pierre.peronnet@ovhcloud.com>
+'''
+
+EXAMPLES = '''
+    - name: Create a consumer key
+      holyhope.ovh.new_consumer_key:
+        application_key: abcde
+        application_secret: abcde
+        accesses:
+          /me: [GET]
+      register: ovh
+
+    - name: "Please validate the consumer key: {{ ovh.validation_url }}"
+      holyhope.ovh.wait_for_validation:
+        application_key: abcde
+        application_secret: abcde
+        consumer_keys:
+        - "{{ ovh.consumer_key }}"
+        timeout: 600
+'''
+
+RETURN = '''
+credentials:
+    description:
+        - The state and id of the credential of each consumer key, in the same order.
+    returned: always
+    type: list
+    elements: dict
+    sample: [{"state": "validated", "credential_id": 1234}]
+polls:
+    description:
+        - The number of polling rounds.
+    returned: always
+    type: int
+    sample: 12
+elapsed:
+    description:
+        - Seconds spent waiting.
+    returned: always
+    type: float
+    sample: 42.1
+'''
+
+PENDING = 'pendingValidation'
+VALIDATED = 'validated'
+
+
+def rejection_state(error: Exception) -> 'Optional[str]':
+    '''
+    Returns the final state of a consumer key from the error of a poll, or None while it may still be validated.
+
+    The API rejects the requests of a consumer key until it is validated, but also once it was refused,
+    expired or deleted: only the former can change.
+
+    >>> from ovh.exceptions import InvalidCredential, NotCredential
+    >>> rejection_state(InvalidCredential('This credential is not valid')) is None
+    True
+    >>> rejection_state(InvalidCredential('This credential does not exist'))
+    'expired'
+    >>> rejection_state(InvalidCredential('This credential has been refused'))
+    'refused'
+    >>> rejection_state(NotCredential('This credential does not exist'))
+    'expired'
+    '''
+    from ovh.exceptions import NotCredential
+
+    message = str(error).lower()
+
+    if 'refused' in message:
+        return 'refused'
+
+    if isinstance(error, NotCredential) or 'expired' in message or 'does not exist' in message:
+        return 'expired'
+
+    return None
+
+
+def intervals(initial: float, maximum: float, factor: float) -> 'Iterator[float]':
+    '''
+    Yields growing intervals between polls, with up to 10% of jitter so that runs do not poll in lockstep.
+
+    >>> from itertools import islice
+    >>> [round(interval) for interval in islice(intervals(1, 4, 2), 5)]
+    [1, 2, 4, 4, 4]
+    '''
+    interval = initial
+
+    while True:
+        yield interval * random.uniform(0.9, 1.0)
+        interval = min(maximum, interval * factor)
+
+
+class WaitForValidationModule(OVHModuleBase):
+    """Configuration class to wait for consumer keys validation"""
+
+    def __init__(self):
+        self.module_arg_spec = dict(
+            consumer_keys=dict(
+                type='list',
+                elements='str',
+                required=True,
+                no_log=True,
+            ),
+            timeout=dict(
+                type='int',
+                required=False,
+                default=900,
+            ),
+            initial_interval=dict(
+                type='float',
+                required=False,
+                default=1,
+            ),
+            max_interval=dict(
+                type='float',
+                required=False,
+                default=30,
+            ),
+            backoff_factor=dict(
+                type='float',
+                required=False,
+                default=1.5,
+            ),
+            concurrency=dict(
+                type='int',
+                required=False,
+                default=DEFAULT_CONCURRENCY,
+            ),
+        )
+
+        super().__init__(self.module_arg_spec, supports_check_mode=True)
+
+    def init_response_cache(self, ttls: 'Optional[Dict[str,Any]]'):
+        # Polls must always reach the API.
+        return None
+
+    def exec_module(self, **kwargs):
+        """Main module execution method"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        credentials: 'List[Dict[str,Any]]' = [dict(state=PENDING, credential_id=None) for _ in self.consumer_keys]
+        pending = list(range(len(self.consumer_keys)))
+        polls = 0
+
+        for interval in intervals(self.initial_interval, self.max_interval, self.backoff_factor):
+            polls += 1
+
+            for index, credential, error in imap_bounded(self.poll, pending, self.concurrency):
+                if error is not None:
+                    self.fail("failed to poll consumer key #%d: %s" % (index, error), credentials=credentials)
+
+                if credential is not None:
+                    credentials[index] = dict(state=credential['status'], credential_id=credential['credentialId'])
+
+            pending = [index for index in pending if credentials[index]['state'] == PENDING]
+
+            refused = [credential for credential in credentials if credential['state'] not in (PENDING, VALIDATED)]
+            if refused:
+                self.fail("%d consumer key(s) will never be validated" % len(refused), credentials=credentials)
+
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+
+            self.debug("%d consumer key(s) still pending, next poll in %.1fs" % (len(pending), interval))
+            time.sleep(min(interval, remaining))
+
+        self.results = dict(credentials=credentials, polls=polls, elapsed=round(time.monotonic() - start, 3))
+
+        if pending:
+            self.fail("%d consumer key(s) not validated after %ds" % (len(pending), self.timeout), **self.results)
+
+    def poll(self, index: int) -> 'Optional[Dict[str,Any]]':
+        '''
+        Returns the current credential of a consumer key, or None while its owner did not validate it.
+        '''
+        from ovh.exceptions import InvalidCredential, NotCredential
+
+        try:
+            return self.delegated_client(self.consumer_keys[index]).get('/auth/currentCredential')
+        except (InvalidCredential, NotCredential) as e:
+            state = rejection_state(e)
+            if state is None:
+                return None
+
+            # Refused or expired keys will never be validated: report them as such, without waiting.
+            return dict(status=state, credentialId=None)
+
+
+def main():
+    """Main execution"""
+    WaitForValidationModule()
+
+
+if __name__ == '__main__':
+    main()
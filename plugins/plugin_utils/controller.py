@@ -0,0 +1,160 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+try:
+    from typing import TYPE_CHECKING
+except ImportError:
+    TYPE_CHECKING = False
+
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Optional
+
+import fcntl
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+from ansible import constants as C
+from ansible.plugins.action import ActionBase
+from ansible.plugins.loader import connection_loader
+
+SHARED_RESULTS_DIR = 'holyhope.ovh'
+
+
+class ControllerActionBase(ActionBase):
+    '''
+    Runs an API module on the controller instead of the target hosts.
+
+    Identical invocations of a task (same module, arguments and loop item) are coalesced
+    across the hosts and forks of a batch: the first one calls the API, the others reuse its result,
+    flagged as coalesced. A host running the task again, e.g. in a loop of includes, calls the API again.
+    Failed results are not reused, nor the results of tasks retried with until, nor those of modules
+    with coalesce disabled.
+    '''
+
+    module_name: 'Optional[str]' = None
+    # Disabled for modules which must return a distinct result to every host, e.g. new keys.
+    coalesce = True
+
+    _connection: 'Any'
+
+    def run(self, tmp=None, task_vars=None):
+        result = super().run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        if task_vars is None:
+            task_vars = dict()
+
+        module_name = self.module_name or self._task.action
+        module_args = self._task.args.copy()
+        key = self._invocation_key(module_name, module_args, task_vars)
+
+        if (module_args.get('profile') or os.environ.get('OVH_PROFILE')) and not module_args.get('profile_name'):
+            # Coalesced invocations are profiled once, under the name of the first host.
+            module_args['profile_name'] = '%s-%s' % (task_vars.get('inventory_hostname', 'localhost'),
+                                                     self._task.get_name())
+
+        if not self.coalesce or self._task.until:
+            # Each retry must call the API again to see the state converge.
+            result.update(self._execute_on_controller(module_name, module_args, task_vars))
+        else:
+            result.update(self._run_once(
+                key,
+                task_vars.get('inventory_hostname', 'localhost'),
+                lambda: self._execute_on_controller(module_name, module_args, task_vars),
+            ))
+
+        return result
+
+    def _invocation_key(self, module_name: str, module_args: 'Dict[str,Any]', task_vars: 'Dict[str,Any]') -> str:
+        loop_var = 'item'
+        if self._task.loop_control and self._task.loop_control.loop_var:
+            loop_var = self._task.loop_control.loop_var
+
+        invocation = dict(
+            task=self._task._uuid,
+            module=module_name,
+            args=module_args,
+            item=task_vars.get(loop_var) if self._task.loop else None,
+            check_mode=self._play_context.check_mode,
+            # Hosts of the other serial batches run the task later, and must see the API as it is then.
+            batch=sorted(task_vars.get('ansible_play_batch') or []),
+        )
+
+        return hashlib.sha256(json.dumps(invocation, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _run_once(self, key: str, host: str, execute: 'Callable[[], Dict[str,Any]]') -> 'Dict[str,Any]':
+        '''
+        Executes the invocation only if another host did not already, sharing the result through
+        the local temporary directory of the run, which is removed when ansible exits.
+
+        The hosts which got the shared result are recorded with it: when one of them runs the invocation
+        again, it is a new run of the task, which executes and shares a fresh result.
+        '''
+        directory = os.path.join(C.DEFAULT_LOCAL_TMP, SHARED_RESULTS_DIR)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        path = os.path.join(directory, key)
+
+        with open(path + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            try:
+                try:
+                    with open(path + '.pickle', 'rb') as f:
+                        shared = pickle.load(f)
+                except (IOError, OSError, EOFError, pickle.UnpicklingError):
+                    shared = None
+
+                if shared is not None and host not in shared['hosts']:
+                    shared['hosts'].append(host)
+                    self._share(path, shared)
+
+                    result = shared['result']
+                    # Tells callbacks that no API call was made for this host.
+                    result['coalesced'] = True
+                    return result
+
+                result = execute()
+                if result.get('failed') or result.get('unreachable'):
+                    # Let the other hosts try again.
+                    if shared is not None:
+                        os.unlink(path + '.pickle')
+                    return result
+
+                self._share(path, dict(result=result, hosts=[host]))
+
+                return result
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _share(path: str, shared: 'Dict[str,Any]'):
+        # Results may hold ansible objects (errors, tagged values) which do not survive JSON.
+        fd = os.open(path + '.pickle', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(shared, f)
+
+    def _execute_on_controller(self, module_name: str, module_args: 'Dict[str,Any]',
+                               task_vars: 'Dict[str,Any]') -> 'Dict[str,Any]':
+        if getattr(self._connection, 'socket_path', None):
+            # Persistent connections (holyhope.ovh.ovh httpapi) already run modules on the controller.
+            return self._execute_module(module_name=module_name, module_args=module_args, task_vars=task_vars)
+
+        local_vars = dict(task_vars)
+        local_vars['ansible_python_interpreter'] = sys.executable
+
+        connection = connection_loader.get('local', self._play_context, new_stdin=None)
+        connection.set_options(var_options={})
+        connection._shell.set_options(var_options={})
+
+        remote_connection, self._connection = self._connection, connection
+        try:
+            return self._execute_module(module_name=module_name, module_args=module_args, task_vars=local_vars)
+        finally:
+            self._remove_tmp_path(connection._shell.tmpdir)
+            self._connection = remote_connection